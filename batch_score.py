@@ -0,0 +1,237 @@
+from priority_scorer import FuzzyPriorityScorer, DEFAULT_CACHE_FILE
+from task import FIELDS
+from task_files import iterJsonTasks, iterJsonLinesTasks
+from task_store import NO_DEADLINE, toMicroseconds, fromMicroseconds
+from tasklist import urgencyFromDeadlines
+import argparse
+import collections
+import concurrent.futures
+import csv
+import datetime
+import heapq
+import itertools
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import textwrap
+import numpy as np
+
+FORMATS = ('json', 'jsonl', 'csv')
+CHUNK_SIZE = 50000      # tasks handed to a worker process at a time
+RUN_BATCH = 1000        # ranked tasks pickled together in a sorted run file
+MERGE_FAN_IN = 64       # sorted runs merged at once, so open files stay bounded
+
+def detectFormat(filename, default='jsonl'):
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    return {'ndjson': 'jsonl'}.get(extension, extension) if extension in FORMATS + ('ndjson',) else default
+
+def iterCsvTasks(file):
+    # columns as written by writeTasks; only task_name and importance are required
+    for row in csv.DictReader(file):
+        yield {
+            'task_id': int(row['task_id']) if row.get('task_id') else None,
+            'task_name': row['task_name'],
+            'importance': int(float(row['importance'])),
+            'deadline': row.get('deadline') or None,
+            'is_complete': (row.get('is_complete') or '').strip().lower() in ('1', 'true', 'yes'),
+        }
+
+READERS = {'json': iterJsonTasks, 'jsonl': iterJsonLinesTasks, 'csv': iterCsvTasks}
+
+def readChunks(filename, input_format, chunk_size):
+    # (position of the first task in the input, tasks) pairs
+    with open(filename, 'r', newline='' if input_format == 'csv' else None) as file:
+        tasks = READERS[input_format](file)
+        position = 0
+        while True:
+            chunk = list(itertools.islice(tasks, chunk_size))
+            if not chunk:
+                return
+            yield position, chunk
+            position += len(chunk)
+
+def mapBounded(executor, fn, items, window, *args):
+    # executor.map that reads at most window items ahead, so the input is never held in memory at once
+    pending = collections.deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item, *args))
+    while pending:
+        yield pending.popleft().result()
+
+def makeScorer(scorer):
+    if scorer == 'lookup':
+        return FuzzyPriorityScorer(use_lookup_table=True, cache_file=DEFAULT_CACHE_FILE)
+    return FuzzyPriorityScorer(backend=scorer)
+
+# worker process side
+_scorer = None
+
+def initWorker(scorer):
+    global _scorer
+    _scorer = makeScorer(scorer)
+
+def parseChunk(chunk):
+    deadlines = np.array([toMicroseconds(datetime.datetime.fromisoformat(task_data['deadline']))
+                          if task_data.get('deadline') else NO_DEADLINE for task_data in chunk], dtype=np.int64)
+    completes = np.array([bool(task_data.get('is_complete')) for task_data in chunk], dtype=bool)
+    return deadlines, completes
+
+def closestDeadline(item):
+    # the closest deadline of an incomplete task in the chunk, None if there is none
+    _, chunk = item
+    deadlines, completes = parseChunk(chunk)
+    deadlines = deadlines[~completes & (deadlines != NO_DEADLINE)]
+    return int(deadlines.min()) if len(deadlines) else None
+
+def scoreChunk(item, now, closest_deadline, top_k, run_directory):
+    # score a chunk the way TaskList.refreshList does, against the anchor of the whole input;
+    # returns its best top_k ranked tasks, or the name of a run file holding all of them sorted
+    position, chunk = item
+    deadlines, completes = parseChunk(chunk)
+    importances = np.array([task_data['importance'] for task_data in chunk], dtype=float)
+
+    urgencies = np.zeros(len(chunk))
+    pending = ~completes & (deadlines != NO_DEADLINE)
+    if closest_deadline is not None:
+        urgencies[pending] = urgencyFromDeadlines(deadlines[pending], now, (closest_deadline - now) / 10**6)
+    scores = np.zeros(len(chunk))
+    scores[~completes] = _scorer.getPriorityScores(importances[~completes], urgencies[~completes])
+
+    ranked = []
+    for k, (task_data, deadline, urgency, score, is_complete) in enumerate(zip(
+            chunk, deadlines.tolist(), urgencies.tolist(), scores.tolist(), completes.tolist())):
+        task_id = task_data.get('task_id')
+        task_id = position + k if task_id is None else int(task_id)
+        values = (task_id, task_data['task_name'], int(task_data['importance']),
+                  None if deadline == NO_DEADLINE else fromMicroseconds(deadline).isoformat(),
+                  urgency, score, is_complete)
+        # same order as the TaskList priority index, input position breaks ties between equal ids
+        ranked.append((-score, task_id, position + k, dict(zip(FIELDS, values))))
+
+    if top_k is not None:
+        return heapq.nsmallest(top_k, ranked)
+    ranked.sort()
+    return writeRun(ranked, run_directory)
+
+def writeRun(ranked, run_directory):
+    with tempfile.NamedTemporaryFile('wb', dir=run_directory, suffix='.run', delete=False) as file:
+        for start in range(0, len(ranked), RUN_BATCH):
+            pickle.dump(ranked[start:start + RUN_BATCH], file, pickle.HIGHEST_PROTOCOL)
+        return file.name
+
+def readRun(run_file):
+    with open(run_file, 'rb') as file:
+        while True:
+            try:
+                yield from pickle.load(file)
+            except EOFError:
+                return
+
+def mergeRuns(run_files, run_directory):
+    # merge sorted runs a few at a time until one merge over all of them is cheap
+    while len(run_files) > MERGE_FAN_IN:
+        merged = []
+        for start in range(0, len(run_files), MERGE_FAN_IN):
+            group = run_files[start:start + MERGE_FAN_IN]
+            with tempfile.NamedTemporaryFile('wb', dir=run_directory, suffix='.run', delete=False) as file:
+                ranked = heapq.merge(*[readRun(run_file) for run_file in group])
+                while True:
+                    batch = list(itertools.islice(ranked, RUN_BATCH))
+                    if not batch:
+                        break
+                    pickle.dump(batch, file, pickle.HIGHEST_PROTOCOL)
+            for run_file in group:
+                os.remove(run_file)
+            merged.append(file.name)
+        run_files = merged
+    return heapq.merge(*[readRun(run_file) for run_file in run_files])
+
+def topTasks(results, top_k):
+    # keep the best top_k tasks over all chunks in a bounded heap, worst kept task on top
+    heap = []
+    for ranked in results:
+        for negative_score, task_id, position, task in ranked:
+            entry = (-negative_score, -task_id, -position, task)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+    return [(-score, -task_id, -position, task) for score, task_id, position, task in sorted(heap, reverse=True)]
+
+def writeTasks(ranked, file, output_format, scorer_version):
+    # stream ranked tasks out; JSON output matches TaskList.saveToJson, so the GUI can open it
+    if output_format == 'json':
+        file.write('{\n    "scorer_version": ' + json.dumps(scorer_version) + ',\n    "tasks": [')
+        first = True
+        for *_, task in ranked:
+            file.write(('\n' if first else ',\n') + textwrap.indent(json.dumps(task, indent=4), ' ' * 8))
+            first = False
+        file.write(']\n}' if first else '\n    ]\n}')
+    elif output_format == 'jsonl':
+        for *_, task in ranked:
+            file.write(json.dumps(task) + '\n')
+    else:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        for *_, task in ranked:
+            writer.writerow(task)
+
+def scoreFile(input_file, output, input_format, output_format, top_k=None, now=None, workers=None,
+              chunk_size=CHUNK_SIZE, scorer='numpy'):
+    # two streaming passes: the first finds the closest deadline every urgency is relative to,
+    # the second scores the chunks against it on all cores
+    now = toMicroseconds(now or datetime.datetime.now())
+    workers = workers or os.cpu_count() or 1
+    scorer_version = makeScorer(scorer).version  # also builds the lookup table cache once for the workers
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=initWorker, initargs=(scorer,)) as executor, \
+            tempfile.TemporaryDirectory() as run_directory:
+        closest = [deadline for deadline in mapBounded(executor, closestDeadline, readChunks(input_file, input_format, chunk_size), workers * 2)
+                   if deadline is not None]
+        closest_deadline = min(closest) if closest else None
+
+        results = mapBounded(executor, scoreChunk, readChunks(input_file, input_format, chunk_size), workers * 2,
+                             now, closest_deadline, top_k, run_directory)
+        ranked = topTasks(results, top_k) if top_k is not None else mergeRuns(list(results), run_directory)
+        writeTasks(ranked, output, output_format, scorer_version)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank tasks from a JSON, JSON-lines or CSV file without the GUI")
+    parser.add_argument('input', help="task file, - for standard input")
+    parser.add_argument('-o', '--output', default='-', help="ranked output file, standard output by default")
+    parser.add_argument('--input-format', choices=FORMATS, help="defaults to the input file extension")
+    parser.add_argument('--output-format', choices=FORMATS, help="defaults to the output file extension, else the input format")
+    parser.add_argument('--top', type=int, metavar='K', help="only write the K highest priority tasks")
+    parser.add_argument('--workers', type=int, help="worker processes, all cores by default")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--scorer', choices=['numpy', 'skfuzzy', 'lookup'], default='numpy')
+    parser.add_argument('--now', type=datetime.datetime.fromisoformat, help="reference time for urgencies, ISO format")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or detectFormat(args.input)
+    output_format = args.output_format or (detectFormat(args.output, input_format) if args.output != '-' else input_format)
+
+    spooled = None
+    input_file = args.input
+    if input_file == '-':  # the input is read twice, so standard input is copied to a file first
+        spooled = tempfile.NamedTemporaryFile('w', suffix='.' + input_format, delete=False)
+        with spooled:
+            shutil.copyfileobj(sys.stdin, spooled)
+        input_file = spooled.name
+    try:
+        if args.output == '-':
+            scoreFile(input_file, sys.stdout, input_format, output_format, args.top, args.now, args.workers, args.chunk_size, args.scorer)
+        else:
+            with open(args.output, 'w', newline='' if output_format == 'csv' else None) as output:
+                scoreFile(input_file, output, input_format, output_format, args.top, args.now, args.workers, args.chunk_size, args.scorer)
+    finally:
+        if spooled:
+            os.remove(spooled.name)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+from priority_scorer import FuzzyPriorityScorer
+from tasklist import TaskList
+from task import Task
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+SAMPLED_CALLS = 200  # single-task operations are timed per call over this many calls
+
+def generateTasks(count, deadline_ratio=0.5, max_days=365, importance='uniform', completion_ratio=0.1, seed=0):
+    # synthetic tasks with a configurable mix of deadlines, importance distribution and completed tasks
+    rng = random.Random(seed)
+    now = datetime.datetime.now()
+    tasks = []
+    for k in range(count):
+        if importance == 'uniform':
+            task_importance = rng.randint(0, 10)
+        elif importance == 'normal':
+            task_importance = min(max(round(rng.gauss(5, 2)), 0), 10)
+        elif importance == 'skewed':  # most tasks unimportant, a few critical
+            task_importance = min(int(rng.expovariate(0.5)), 10)
+        else:
+            raise ValueError(f"Unknown importance distribution: {importance}")
+        deadline = now + datetime.timedelta(seconds=rng.uniform(3600, max_days * 86400)) if rng.random() < deadline_ratio else None
+        task = Task(f"task {k}", task_importance, deadline)
+        task.is_complete = rng.random() < completion_ratio
+        tasks.append(task)
+    return tasks
+
+def percentile(sorted_values, fraction):
+    # nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def measure(operation, size, run, repeats, track_memory, setup=None):
+    # run() performs one timed unit and returns how many tasks it covered; setup(), if given, prepares
+    # its input before each run, outside the timing and the memory tracking
+    latencies, items = [], 0
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        items += run()
+        latencies.append(time.perf_counter() - start)
+
+    peak_memory = None
+    if track_memory:  # separate pass, tracemalloc slows the timed runs down
+        if setup:
+            setup()
+        tracemalloc.start()
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'operation': operation,
+        'size': size,
+        'runs': repeats,
+        'throughput_per_s': items / sum(latencies) if sum(latencies) else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.5) * 1000,
+            'p90': percentile(latencies, 0.9) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': latencies[-1] * 1000,
+        },
+        'peak_memory_mb': peak_memory,
+    }
+
+def makeScorer(scorer):
+    if scorer == 'lookup':
+        return FuzzyPriorityScorer(use_lookup_table=True)
+    return FuzzyPriorityScorer(backend=scorer)
+
+def benchmarkSize(size, args, scorer, directory):
+    generate = lambda count, seed: generateTasks(count, args.deadline_ratio, args.max_days, args.importance, args.completion_ratio, seed)
+    tasks = generate(size, args.seed)
+    importances = [task.importance for task in tasks]
+    rng = random.Random(args.seed)
+    urgencies = [rng.uniform(0, 10) for _ in tasks]
+    calls = min(size, SAMPLED_CALLS)
+    results = []
+
+    def bench(operation, run, repeats=args.repeats, setup=None):
+        result = measure(operation, size, run, repeats, not args.no_memory, setup)
+        results.append(result)
+        print(f"{operation:>18} {size:>9}  p50 {result['latency_ms']['p50']:10.3f} ms  "
+              f"{result['throughput_per_s'] or 0:14.0f} tasks/s", file=sys.stderr)
+
+    # scorer
+    sample = iter(range(10**9))
+    def scoreOne():
+        k = next(sample) % size
+        scorer.getPriorityScore(importances[k], urgencies[k])
+        return 1
+    bench('getPriorityScore', scoreOne, repeats=calls)
+    def scoreAll():
+        scorer.getPriorityScores(importances, urgencies)
+        return size
+    bench('getPriorityScores', scoreAll)
+
+    # bulk insert into a fresh list, then single-task operations on the populated one; each run gets
+    # freshly generated tasks, since added tasks become views of the list they were added to
+    prebuilt = []
+    def addTasks():
+        TaskList(scorer).addTasks(prebuilt.pop())
+        return size
+    bench('addTasks', addTasks, setup=lambda: prebuilt.append(generate(size, args.seed)))
+
+    task_list = TaskList(scorer)
+    task_list.addTasks(tasks)
+    extra = iter(generate(calls + 1, args.seed + 1))
+    def addOne():
+        task_list.addTask(next(extra))
+        return 1
+    bench('addTask', addOne, repeats=calls)
+
+    ids = [task.task_id for task in tasks]
+    toggles = iter(range(10**9))
+    def toggleOne():
+        task_list.triggerCompletion(ids[next(toggles) * 7919 % size])
+        return 1
+    bench('triggerCompletion', toggleOne, repeats=calls)
+
+    def refresh():
+        task_list.refreshList()
+        return len(task_list)
+    bench('refreshList', refresh)
+    def sort():
+        task_list.sortTasks()
+        return len(task_list)
+    bench('sortTasks', sort)
+
+    # persistence
+    filename = os.path.join(directory, f'tasks_{size}.json')
+    def save():
+        task_list.saveToJson(filename)
+        return len(task_list)
+    bench('saveToJson', save)
+    def load():
+        loaded = TaskList(scorer)
+        loaded.loadFromJson(filename)
+        return len(loaded)
+    bench('loadFromJson', load)
+    return results
+
+def compare(results, baseline, threshold):
+    # flag operations whose median latency grew by more than threshold over the baseline
+    previous = {(result['operation'], result['size']): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        base = previous.get((result['operation'], result['size']))
+        if base is None:
+            continue
+        ratio = result['latency_ms']['p50'] / base['latency_ms']['p50'] if base['latency_ms']['p50'] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append({'operation': result['operation'], 'size': result['size'], 'slowdown': ratio})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the scorer, TaskList and persistence")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeats', type=int, default=3, help="timed runs of each whole-list operation")
+    parser.add_argument('--scorer', choices=['numpy', 'skfuzzy', 'lookup'], default='numpy')
+    parser.add_argument('--deadline-ratio', type=float, default=0.5)
+    parser.add_argument('--max-days', type=int, default=365)
+    parser.add_argument('--importance', choices=['uniform', 'normal', 'skewed'], default='uniform')
+    parser.add_argument('--completion-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak memory pass")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed median latency growth over the baseline")
+    args = parser.parse_args(argv)
+
+    scorer = makeScorer(args.scorer)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            results.extend(benchmarkSize(size, args, scorer, directory))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scorer': args.scorer,
+            'scorer_version': scorer.version,
+            'timestamp': datetime.datetime.now().isoformat(),
+            'options': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['operation']} at {regression['size']} tasks: "
+                  f"{regression['slowdown']:.2f}x slower", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,14 +3,61 @@ from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
 import datetime
 from task import Task
-from priority_scorer import FuzzyPriorityScorer
 from tasklist import TaskList
+from journal import TaskJournal, saveSnapshot
+from sqlite_storage import SqliteStorage
+from task_files import fileFormat
+from worker import TaskWorker, JobCancelled
+import metrics
+import bisect
+
+VIRTUALIZE_THRESHOLD = 1000  # longer lists only materialize a window of rows around the viewport
+VIRTUAL_PAGE_SIZE = 200  # rows in that window, the viewport plus a buffer on either side
+VIRTUAL_EDGE = 0.1  # share of the window left above or below the view before the window is moved
+POLL_INTERVAL_MS = 50  # how often the Tk loop picks up results from the worker thread
+METRICS_INTERVAL_MS = 1000  # how often the metrics readout in the status bar is updated
+FILTER_DELAY_MS = 250  # typing pause before the filter is applied, so each keystroke does not search
+URGENCY_MIN_WAIT_MS = 1000  # urgency changes closer together than this are rescored in one go
+URGENCY_MAX_WAIT_MS = 3600000  # wake at least this often, in case the clock jumped
+TASK_FILE_TYPES = [("JSON Files", "*.json"), ("JSON Lines Files", "*.jsonl"), ("Binary Task Files", "*.tasks")]
+
+def longestIncreasingRun(sequence):
+  # values of one longest increasing subsequence, found by patience sorting
+  tails, tail_indices, previous = [], [], [None] * len(sequence)
+  for i, value in enumerate(sequence):
+    pile = bisect.bisect_left(tails, value)
+    if pile == len(tails):
+      tails.append(value)
+      tail_indices.append(i)
+    else:
+      tails[pile] = value
+      tail_indices[pile] = i
+    previous[i] = tail_indices[pile - 1] if pile else None
+
+  run = set()
+  i = tail_indices[-1] if tail_indices else None
+  while i is not None:
+    run.add(sequence[i])
+    i = previous[i]
+  return run
 
 class Gui:
-  def __init__(self, root, task_list: TaskList):
+  def __init__(self, root, task_list: TaskList, use_journal=False, show_metrics=False, merge_rule="first", database=None):
     self.task_list = task_list  # Use your existing TaskList class
     self.file_path = None
     self.is_unsaved = False
+    self.use_journal = use_journal  # append each change to a journal instead of rewriting the file
+    self.journal = None
+    self.database = None  # SqliteStorage every change is written to, instead of a task file
+    self.merge_rule = merge_rule  # which copy of a task found in several imported files is kept
+
+    # Loading, scoring and saving run on a worker thread so the window never blocks
+    self.worker = TaskWorker(self.task_list)
+    self.refresh_pending = False
+    self.load_job = None
+    self.filter_text = ""  # only tasks whose name contains this are shown
+    self.filter_after = None
+    self.urgency_after = None  # timer for the next urgency change
 
     self.root = root
     self.root.title("Fuzzy To-do List")
@@ -22,6 +69,7 @@ class Gui:
     self.frame_top.pack(pady=10)
     self.frame_top.grid_rowconfigure(0, weight=1)
     self.frame_top.grid_rowconfigure(1, weight=1)
+    self.frame_top.grid_rowconfigure(2, weight=1)
     self.frame_top.grid_columnconfigure(1, weight=1)
     
     # Task entry form
@@ -61,12 +109,32 @@ class Gui:
     self.load_button = tk.Button(self.frame_top, text="Load", command=self.loadTasks)
     self.load_button.grid(row=1, column=7, padx=5)
 
+    self.import_button = tk.Button(self.frame_top, text="Import", command=self.importTasks)
+    self.import_button.grid(row=1, column=6, padx=5)
+
+    # Live filter over the task names
+    tk.Label(self.frame_top, text="Filter:").grid(row=2, column=0, padx=5, sticky="w")
+    self.filter_entry = tk.Entry(self.frame_top)
+    self.filter_entry.grid(row=2, column=1, padx=5, sticky="ew")
+    self.filter_entry.bind("<KeyRelease>", self.onFilterChanged)
+
     # Task list display
     self.tree = ttk.Treeview(self.root, columns=("Name", "Complete", "Deadline"), show="headings")
     self.tree.heading("Name", text="Task Name")
     self.tree.heading("Complete", text="Status")
     self.tree.heading("Deadline", text="Deadline")
 
+    # Rows currently shown, keyed by task id, so refreshes only touch what changed
+    self.row_order = []
+    self.row_values = {}
+    self.row_first = 0  # position in the whole order of the first materialized row
+    self.row_total = 0  # rows in the whole order, which the scrollbar spans
+    self.window_after = None
+
+    self.tree_scrollbar = ttk.Scrollbar(self.root, orient=tk.VERTICAL, command=self.onScrollbar)
+    self.tree.configure(yscrollcommand=self.onTreeScroll)
+    self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
+
     self.tree.pack(pady=10)
     self.tree.bind("<Double-1>", self.editTask)
     self.tree.pack(fill=tk.BOTH, expand=True)
@@ -81,8 +149,42 @@ class Gui:
     self.complete_task_button.pack(side=tk.LEFT, padx=5, fill=tk.X)
     self.delete_task_button.pack(side=tk.LEFT, padx=5, fill=tk.X)
 
+    # Status bar with progress and cancel for long loads
+    self.status_frame = tk.Frame(self.root)
+    self.status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=2)
+    self.status_label = tk.Label(self.status_frame, text="", anchor="w")
+    self.status_label.pack(side=tk.LEFT)
+    self.progress_bar = ttk.Progressbar(self.status_frame, length=200, mode="determinate")
+    self.cancel_button = tk.Button(self.status_frame, text="Cancel", command=self.cancelLoad)
+    self.metrics_label = tk.Label(self.status_frame, text="", anchor="e")
+    if show_metrics:
+      self.metrics_label.pack(side=tk.RIGHT)
+      self.root.after(METRICS_INTERVAL_MS, self.updateMetrics)
+
+    self.root.after(POLL_INTERVAL_MS, self.pollWorker)
+
 
     self.root.protocol("WM_DELETE_WINDOW", self.onClose)
+    if database:
+      self.openDatabase(database)
+
+  def openDatabase(self, filename):
+    # Show the top page straight from the database while the whole list is read on the worker
+    self.database = SqliteStorage(filename, self.task_list.priority_scorer)
+    self.updateRows(self.database.topTasks(VIRTUAL_PAGE_SIZE, include_complete=True))
+
+    def onLoaded(result):
+      self.hideLoading()
+      self.refreshTaskList()
+
+    def onError(e):
+      self.hideLoading()
+      if not isinstance(e, JobCancelled):
+        messagebox.showerror("Error", f"Failed to load tasks: {e}")
+
+    self.showLoading()
+    self.load_job = self.worker.submit(lambda job: self.database.load(self.task_list, progress=job.progress),
+                                       on_done=onLoaded, on_error=onError, on_progress=self.showProgress)
 
   def addTask(self):
     task_name = self.task_name_entry.get()
@@ -95,10 +197,8 @@ class Gui:
         raise ValueError("Task name cannot be empty")
       deadline = datetime.datetime.strptime(deadline_text, "%Y-%m-%d") if deadline_text else None
       task = Task(task_name, importance, deadline)
-      self.task_list.addTask(task)
-      self.refreshTaskList()
+      self.worker.submit(lambda job: self.task_list.addTask(task), on_done=self.onTasksChanged, on_error=self.showError)
       self.resetEntries()
-      self.is_unsaved = True
     except ValueError as e:
       messagebox.showerror("Invalid input", e)
 
@@ -114,47 +214,213 @@ class Gui:
     self.toggleDeadline()  # Update the state of the deadline picker (disable it)
 
 
+  @metrics.timed('refreshTaskList')
   def refreshTaskList(self):
-    # Clear the current display
-    for row in self.tree.get_children():
-        self.tree.delete(row)
+    # The worker may be changing the list right now; redraw once it is done
+    if not self.worker.tryLock():
+      self.refresh_pending = True
+      return
+    try:
+      self.updateRows()
+      self.scheduleUrgencyRefresh()
+    finally:
+      self.worker.unlock()
+
+  def updateRows(self, tasks=None):
+    # Show tasks, or the list's own; large lists only materialize the window of rows around the viewport
+    if tasks is None:
+      task_ids = self.task_list.searchIds(text=self.filter_text) if self.filter_text else None
+      self.row_total = len(self.task_list) if task_ids is None else len(task_ids)
+      size = self.row_total if self.row_total <= VIRTUALIZE_THRESHOLD else VIRTUAL_PAGE_SIZE
+      self.row_first = first = max(min(self.row_first, self.row_total - size), 0)  # the list may have shrunk
+      if task_ids is None:
+        tasks = self.task_list.tasksInRange(first, first + size)
+      else:
+        tasks = [self.task_list.getTask(task_id) for task_id in task_ids[first:first + size].tolist()]
+    else:
+      self.row_first, self.row_total = 0, len(tasks)
+    new_order = [task.task_id for task in tasks]
+    new_ids = set(new_order)
+
+    # Delete rows of tasks that are gone or fell out of the window
+    stale = [task_id for task_id in self.row_order if task_id not in new_ids]
+    if stale:
+      self.tree.delete(*stale)
+      for task_id in stale:
+        del self.row_values[task_id]
+
+    # Rows on the longest run that kept its relative order stay put, the others are detached and moved
+    positions = {task_id: i for i, task_id in enumerate(task_id for task_id in self.row_order if task_id in new_ids)}
+    kept = longestIncreasingRun([positions[task_id] for task_id in new_order if task_id in positions])
+    moved = [task_id for task_id in new_order if task_id in positions and positions[task_id] not in kept]
+    if moved:
+      self.tree.detach(*moved)
+
+    for index, task in enumerate(tasks):
+      status = "Complete" if task.is_complete else "Incomplete"
+      deadline = task.deadline.date() if task.deadline else ""
+      values = (task.task_name, status, deadline)
+      if task.task_id not in positions:
+        self.tree.insert("", index, iid=task.task_id, values=values)
+      else:
+        if positions[task.task_id] not in kept:
+          self.tree.move(task.task_id, "", index)
+        if self.row_values[task.task_id] != values:
+          self.tree.item(task.task_id, values=values)
+      self.row_values[task.task_id] = values
+    self.row_order = new_order
+
+  def onTreeScroll(self, first, last):
+    # The tree only holds the window, the scrollbar spans the whole order
+    first, last = float(first), float(last)
+    count = len(self.row_order)
+    if not count or self.row_total <= count:
+      self.tree_scrollbar.set(first, last)
+      return
+    top = self.row_first + first * count
+    self.tree_scrollbar.set(top / self.row_total, (self.row_first + last * count) / self.row_total)
+    # Move the window once the view gets near one of its edges, unless that edge is the end of the list
+    near_end = last > 1 - VIRTUAL_EDGE and self.row_first + count < self.row_total
+    near_start = first < VIRTUAL_EDGE and self.row_first > 0
+    moved = self.windowStart(top) != self.row_first  # a view taller than the window can leave it where it is
+    if (near_end or near_start) and moved and self.window_after is None:
+      self.window_after = self.root.after_idle(lambda: self.scrollToRow(top))
+
+  def windowStart(self, row):
+    # first row of a window that shows row with a buffer above it
+    return max(min(int(row) - VIRTUAL_PAGE_SIZE // 4, self.row_total - VIRTUAL_PAGE_SIZE), 0)
+
+  def onScrollbar(self, *args):
+    if args[0] == "moveto" and self.row_total > len(self.row_order):
+      self.scrollToRow(float(args[1]) * self.row_total)
+    else:  # steps scroll the tree within the window, which moves along once they near its edges
+      self.tree.yview(*args)
+
+  def scrollToRow(self, row):
+    # Materialize the window around row of the whole order and show row at the top of the view
+    self.window_after = None
+    row = min(max(int(row), 0), max(self.row_total - 1, 0))
+    self.row_first = self.windowStart(row)
+    self.refreshTaskList()
+    if self.row_order:
+      self.tree.yview_moveto((row - self.row_first) / len(self.row_order))
+
+  def scheduleUrgencyRefresh(self):
+    # Urgencies move with the time, so wake when the next one changes instead of rescanning every task
+    if self.urgency_after is not None:
+      self.root.after_cancel(self.urgency_after)
+      self.urgency_after = None
+    next_change = self.task_list.nextUrgencyChange()
+    if next_change is None:
+      return
+    delay = (next_change - datetime.datetime.now()) // datetime.timedelta(milliseconds=1)
+    self.urgency_after = self.root.after(min(max(delay, URGENCY_MIN_WAIT_MS), URGENCY_MAX_WAIT_MS), self.refreshUrgencies)
+
+  def refreshUrgencies(self):
+    # Rescore and reorder only the tasks whose urgency changed; the redraw schedules the next wake
+    self.urgency_after = None
+    self.worker.submit(lambda job: self.task_list.rescoreDue(), on_done=lambda result: self.refreshTaskList(),
+                       on_error=self.showError, coalesce_key="urgency")
+
+  def onFilterChanged(self, event=None):
+    # Wait for a pause in typing before searching
+    if self.filter_after is not None:
+      self.root.after_cancel(self.filter_after)
+    self.filter_after = self.root.after(FILTER_DELAY_MS, self.applyFilter)
+
+  def applyFilter(self):
+    self.filter_after = None
+    filter_text = self.filter_entry.get().strip()
+    if filter_text == self.filter_text:
+      return
 
-    self.task_list.refreshList()
+    def onIndexed(result):
+      self.filter_text = filter_text
+      self.row_first = 0
+      self.refreshTaskList()
 
-    # Re-populate the tree with sorted tasks
-    for i, task in enumerate(self.task_list.tasks):
-        status = "Complete" if task.is_complete else "Incomplete"
-        deadline = task.deadline.date() if task.deadline else ""
-        self.tree.insert("", "end", iid=i, values=(task.task_name, status, deadline))
+    # The search index is built on the worker the first time, later filters only search it
+    self.worker.submit(lambda job: self.task_list.index, on_done=onIndexed, on_error=self.showError, coalesce_key="filter")
 
   def toggleComplete(self):
     selected_item = self.tree.focus()
     if selected_item:
-        index = int(selected_item)
-        self.task_list.triggerCompletion(index)
-        self.refreshTaskList()
-        self.is_unsaved = True
+        task_id = int(selected_item)
+        self.worker.submit(lambda job: self.task_list.triggerCompletion(task_id), on_done=self.onTasksChanged, on_error=self.showError)
 
   def deleteTask(self):
     selected_item = self.tree.focus()
     if selected_item:
-      index = int(selected_item)
-      self.task_list.deleteTask(index)
+      task_id = int(selected_item)
+      self.worker.submit(lambda job: self.task_list.deleteTask(task_id), on_done=self.onTasksChanged, on_error=self.showError)
+
+  def updateMetrics(self):
+    self.metrics_label.config(text=metrics.summary())
+    self.root.after(METRICS_INTERVAL_MS, self.updateMetrics)
+
+  def pollWorker(self):
+    self.worker.poll()
+    if self.refresh_pending and not self.worker.busy:
+      self.refresh_pending = False
       self.refreshTaskList()
-      self.is_unsaved = True
+    self.root.after(POLL_INTERVAL_MS, self.pollWorker)
+
+  def onTasksChanged(self, result=None):
+    self.refreshTaskList()
+    self.markUnsaved()
+
+  def showError(self, error):
+    messagebox.showerror("Error", error)
+
+  def showProgress(self, done, total):
+    self.status_label.config(text=f"Loading tasks... {done}/{total}")
+    self.progress_bar.config(maximum=max(total, 1), value=done)
+
+  def showLoading(self):
+    self.status_label.config(text="Loading tasks...")
+    self.progress_bar.config(value=0)
+    self.progress_bar.pack(side=tk.LEFT, padx=5)
+    self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+  def hideLoading(self):
+    self.status_label.config(text="")
+    self.progress_bar.pack_forget()
+    self.cancel_button.pack_forget()
+    self.load_job = None
+
+  def cancelLoad(self):
+    if self.load_job:
+      self.load_job.cancel()
+
+  def markUnsaved(self):
+    # with a journal or database attached every change is already on disk
+    self.is_unsaved = self.journal is None and self.database is None
 
   def saveTasks(self):
     if not self.file_path:
       # Open file dialog if no file path is set
-      self.file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+      self.file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=TASK_FILE_TYPES)
       if not self.file_path:
         return
-    try:
-      self.task_list.saveToJson(self.file_path)
+    file_path = self.file_path
+
+    def save(job):
+      if self.journal:
+        self.journal.compact()  # fold the journal into a fresh snapshot in the background
+      else:
+        saveSnapshot(self.task_list, file_path)  # with a database this exports the list
+        if self.use_journal and not self.database and fileFormat(file_path) == 'json':  # the journal snapshot is JSON
+          self.journal = TaskJournal(file_path)
+          self.journal.attach(self.task_list)
+
+    def onSaved(result):
       self.is_unsaved = False
-    except Exception as e:
+
+    def onError(e):
       messagebox.showerror("Error", f"Failed to save tasks: {e}")
 
+    self.worker.submit(save, on_done=onSaved, on_error=onError, coalesce_key="save")
+
 
   def loadTasks(self):
 
@@ -165,22 +431,71 @@ class Gui:
       elif answer:
         self.saveTasks()  # Save tasks if the user clicked 'Yes'
 
-    # Open file dialog to select a JSON file
-    file_path = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")])
+    # Open file dialog to select a task file
+    file_path = filedialog.askopenfilename(filetypes=TASK_FILE_TYPES)
 
     if not file_path:
       return
+    elif self.database and not messagebox.askokcancel("Load", "Replace the tasks in the database with this file?"):
+      return
     else:
       self.file_path = file_path
     
     if self.file_path:
-      try:
-        self.task_list.tasks.clear()
-        self.task_list.loadFromJson(self.file_path)  # Load tasks from the selected file
+      file_path = self.file_path
+
+      def load(job):
+        if self.journal:
+          self.journal.close()
+          self.journal = None
+        if self.database:
+          self.database.importFile(file_path, self.task_list, progress=job.progress)
+        elif self.use_journal and fileFormat(file_path) == 'json':
+          journal = TaskJournal(file_path)
+          journal.load(self.task_list)  # Replay the snapshot and its journal
+          self.journal = journal
+        else:
+          # Load tasks from the selected file; the current list is only replaced once the file is read
+          self.task_list.loadFromFile(file_path, replace=True, progress=job.progress)
+        if self.filter_text:
+          self.task_list.index  # Rebuild the search index here rather than in the next redraw
+
+      def onLoaded(result):
+        self.hideLoading()
+        self.row_first = 0
         self.refreshTaskList()
         self.is_unsaved = False
-      except Exception as e:
-        messagebox.showerror("Error", f"Failed to load tasks: {e}")
+
+      def onError(e):
+        self.hideLoading()
+        if not isinstance(e, JobCancelled):
+          messagebox.showerror("Error", f"Failed to load tasks: {e}")
+
+      self.showLoading()
+      self.load_job = self.worker.submit(load, on_done=onLoaded, on_error=onError, on_progress=self.showProgress)
+
+  def importTasks(self):
+    # Merge several task files into the list; tasks already in it or in another file are added once
+    file_paths = filedialog.askopenfilenames(filetypes=TASK_FILE_TYPES)
+    if not file_paths:
+      return
+
+    def merge(job):
+      self.task_list.mergeFromFiles(list(file_paths), rule=self.merge_rule, progress=job.progress)
+      if self.filter_text:
+        self.task_list.index  # Rebuild the search index here rather than in the next redraw
+
+    def onMerged(result):
+      self.hideLoading()
+      self.onTasksChanged()
+
+    def onError(e):
+      self.hideLoading()
+      if not isinstance(e, JobCancelled):
+        messagebox.showerror("Error", f"Failed to import tasks: {e}")
+
+    self.showLoading()
+    self.load_job = self.worker.submit(merge, on_done=onMerged, on_error=onError, on_progress=self.showProgress)
 
   def toggleDeadline(self, *args):
     if self.deadline_exists.get() == 1:  # If deadline exists
@@ -200,6 +515,11 @@ class Gui:
         return  # User clicked cancel, do nothing
       elif answer:
         self.saveTasks()  # Save tasks if the user clicked 'Yes'
+    self.worker.stop()  # let queued work, including that save, finish
+    if self.journal:
+      self.journal.close()
+    if self.database:
+      self.database.close()
     self.root.quit()  # Close the application
 
   def editTask(self, event):
@@ -208,9 +528,18 @@ class Gui:
     if not selected_item:
         return
 
-    index = int(selected_item)
-    task = self.task_list.tasks[index]
-    initial_status = task.is_complete
+    task_id = int(selected_item)
+    # The worker may be changing the list right now; read the task once it is done
+    if not self.worker.tryLock():
+      self.root.after(POLL_INTERVAL_MS, lambda: self.editTask(event))
+      return
+    try:
+      task = self.task_list.getTask(task_id)
+      task.detach()  # a copy, since the worker may change or reuse the row while the window is open
+    except KeyError:
+      return  # deleted by a job that was still queued when the row was clicked
+    finally:
+      self.worker.unlock()
 
     # Create the pop-up window
     edit_window = tk.Toplevel(self.root)
@@ -266,21 +595,16 @@ class Gui:
       new_importance = importance_slider.get()
       new_deadline = datetime.datetime.strptime(deadline_picker.get(), "%Y-%m-%d") if deadline_exists.get() else None
 
-      if completeness_var.get() != initial_status:
-        self.task_list.triggerCompletion(index)
-
       # Validate input
       if not new_task_name:
         messagebox.showerror("Invalid input", "Task name cannot be empty")
         return
 
-      # Update the task and refresh the list
-      task.task_name = new_task_name
-      task.importance = new_importance
-      task.deadline = new_deadline
-      self.refreshTaskList()
-
-      self.is_unsaved = True
+      # Update the task on the worker, which rescores and repositions only this task, and refresh the list
+      new_status = completeness_var.get()
+      self.worker.submit(lambda job: self.task_list.updateTask(task_id, task_name=new_task_name, importance=new_importance,
+                                                              deadline=new_deadline, is_complete=new_status),
+                         on_done=self.onTasksChanged, on_error=self.showError)
 
       edit_window.destroy()  # Close the pop-up window
 
@@ -0,0 +1,120 @@
+from storage import TaskStorage
+from tasklist import TaskList, writeJsonAtomic
+import json
+import os
+import threading
+
+COMPACT_THRESHOLD = 1024 * 1024  # journal size in bytes that triggers a background compaction
+
+def removeJournal(filename):
+    # drop the journals of a snapshot file; they hold changes to an older snapshot than the one just written
+    for journal_file in (filename + '.journal', filename + '.journal.compacting'):
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
+
+def saveSnapshot(task_list:TaskList, filename):
+    # write the whole list, so any journal left next to the file is replaced by it
+    task_list.saveToFile(filename)
+    removeJournal(filename)
+
+class TaskJournal(TaskStorage):
+    # append-only storage: a JSON snapshot plus a JSON-lines journal of the changes made since
+    def __init__(self, filename, compact_threshold=COMPACT_THRESHOLD):
+        self.filename = filename
+        self.journal_file = filename + '.journal'
+        self.compacting_file = filename + '.journal.compacting'
+        self.compact_threshold = compact_threshold
+        self.task_list = None
+        self._file = None
+        self._compaction = None
+
+    def attach(self, task_list:TaskList):
+        # from now on every add/edit/complete/delete on the list is appended here
+        super().attach(task_list)
+        self._file = open(self.journal_file, 'a')
+
+    def detach(self):
+        self.waitForCompaction()
+        super().detach()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def recordPut(self, task):
+        self._append({'op': 'put', 'task': task.toDict()})
+
+    def recordDelete(self, task_id):
+        self._append({'op': 'delete', 'task_id': task_id})
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        if self._file.tell() > self.compact_threshold:
+            self.compact()
+
+    def load(self, task_list:TaskList):
+        # replay snapshot + journal into the list, then keep journaling its changes
+        self.detach()
+        data = {'tasks': []}
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r') as file:
+                data = json.load(file)
+        if isinstance(data, list):  # older files are a bare list of tasks
+            data = {'tasks': data}
+
+        tasks = {}
+        for position, task_data in enumerate(data['tasks']):
+            task_id = task_data.get('task_id')
+            tasks[('position', position) if task_id is None else task_id] = task_data
+        missing_ids = any(isinstance(task_id, tuple) for task_id in tasks)
+        # a leftover compacting journal means a compaction was interrupted; replaying it again is harmless
+        for journal_file in (self.compacting_file, self.journal_file):
+            for record in self._readRecords(journal_file):
+                if record['op'] == 'put':
+                    tasks[record['task']['task_id']] = record['task']
+                elif record['op'] == 'delete':
+                    tasks.pop(record['task_id'], None)
+
+        task_list.clear()
+        task_list.loadFromData({'tasks': list(tasks.values())})
+        if missing_ids:  # journal records name tasks by id, so the snapshot has to hold the ids they were given
+            saveSnapshot(task_list, self.filename)
+        self.attach(task_list)
+
+    def _readRecords(self, journal_file):
+        if not os.path.exists(journal_file):
+            return
+        with open(journal_file, 'r') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return  # torn last line from a crash mid-append
+
+    def compact(self):
+        # fold the journal into a fresh snapshot, written in the background
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        data = self.task_list.toJsonData()
+
+        # rotate the journal so new changes go to an empty one while the snapshot is written
+        self._file.close()
+        if os.path.exists(self.compacting_file):  # left over from an interrupted compaction
+            with open(self.journal_file, 'r') as source, open(self.compacting_file, 'a') as target:
+                target.write(source.read())
+            os.remove(self.journal_file)
+        else:
+            os.replace(self.journal_file, self.compacting_file)
+        self._file = open(self.journal_file, 'a')
+
+        self._compaction = threading.Thread(target=self._writeSnapshot, args=(data,), daemon=True)
+        self._compaction.start()
+
+    def _writeSnapshot(self, data):
+        writeJsonAtomic(self.filename, data)
+        os.remove(self.compacting_file)
+
+    def waitForCompaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
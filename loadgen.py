@@ -0,0 +1,137 @@
+from benchmark import percentile
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import sys
+import time
+
+# share of each operation in the generated traffic
+DEFAULT_MIX = {'add': 0.4, 'edit': 0.2, 'complete': 0.1, 'delete': 0.1, 'top': 0.2}
+
+class HttpClient:
+    # one keep-alive connection to the task service
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, data=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(data).encode() if data is not None else b''
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if not line.strip():
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        content = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, json.loads(content) if content else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = self.reader = None
+
+async def runClient(client_id, args, task_ids, latencies, errors):
+    # each client works on one list at a time, picking operations from the mix
+    rng = random.Random(args.seed + client_id)
+    client = HttpClient(args.host, args.port)
+    operations, weights = zip(*args.mix.items())
+    now = datetime.datetime.now()
+    try:
+        for _ in range(args.requests):
+            name = f"{args.prefix}{rng.randrange(args.lists)}"
+            known = task_ids[name]
+            operation = rng.choices(operations, weights)[0]
+            if operation in ('edit', 'complete', 'delete') and not known:
+                operation = 'add'
+
+            if operation == 'add':
+                deadline = now + datetime.timedelta(seconds=rng.uniform(3600, 90 * 86400)) if rng.random() < 0.5 else None
+                request = ('POST', f"/lists/{name}/tasks", {'task_name': f"task {rng.randrange(10**9)}",
+                                                             'importance': rng.randint(0, 10),
+                                                             'deadline': deadline.isoformat() if deadline else None})
+            elif operation == 'edit':
+                request = ('PATCH', f"/lists/{name}/tasks/{rng.choice(known)}", {'importance': rng.randint(0, 10)})
+            elif operation == 'complete':
+                request = ('POST', f"/lists/{name}/tasks/{rng.choice(known)}/complete", None)
+            elif operation == 'delete':
+                task_id = known.pop(rng.randrange(len(known)))
+                request = ('DELETE', f"/lists/{name}/tasks/{task_id}", None)
+            else:
+                request = ('GET', f"/lists/{name}/tasks?limit={args.top}", None)
+
+            start = time.perf_counter()
+            status, payload = await client.request(*request)
+            latencies[operation].append(time.perf_counter() - start)
+            if status >= 400:
+                errors[operation] = errors.get(operation, 0) + 1  # e.g. a task another client deleted
+            elif operation == 'add':
+                known.append(payload['task_id'])
+    finally:
+        client.close()
+
+async def run(args):
+    task_ids = {f"{args.prefix}{k}": [] for k in range(args.lists)}
+    latencies = {operation: [] for operation in args.mix}
+    errors = {}
+    start = time.perf_counter()
+    await asyncio.gather(*[runClient(client_id, args, task_ids, latencies, errors) for client_id in range(args.clients)])
+    elapsed = time.perf_counter() - start
+
+    results = []
+    for operation, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        results.append({
+            'operation': operation,
+            'requests': len(values),
+            'errors': errors.get(operation, 0),
+            'latency_ms': {
+                'p50': percentile(values, 0.5) * 1000,
+                'p90': percentile(values, 0.9) * 1000,
+                'p99': percentile(values, 0.99) * 1000,
+                'max': values[-1] * 1000,
+            },
+        })
+        print(f"{operation:>9} {len(values):>8}  p50 {results[-1]['latency_ms']['p50']:8.3f} ms  "
+              f"p99 {results[-1]['latency_ms']['p99']:8.3f} ms", file=sys.stderr)
+    total = sum(len(values) for values in latencies.values())
+    return {'requests': total, 'seconds': elapsed, 'throughput_per_s': total / elapsed if elapsed else None, 'results': results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load against a running task service and report latencies")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--clients', type=int, default=32, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=500, help="requests per client")
+    parser.add_argument('--lists', type=int, default=8, help="named lists the traffic is spread over")
+    parser.add_argument('--prefix', default='load', help="names of the lists are this prefix plus a number")
+    parser.add_argument('--top', type=int, default=20, help="tasks fetched by each top-N request")
+    parser.add_argument('--mix', type=json.loads, default=DEFAULT_MIX, help="operation weights as JSON")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(f"{report['requests']} requests in {report['seconds']:.2f} s, {report['throughput_per_s']:.0f} requests/s", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
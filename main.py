@@ -1,12 +1,59 @@
+import argparse
+import json
+import metrics
+import time
 import tkinter as tk
-from tasklist import TaskList
-from gui import Gui
 
 def main():
+  started = time.perf_counter()
+  parser = argparse.ArgumentParser(description="Fuzzy To-do List")
+  parser.add_argument("--journal", action="store_true", help="append changes to a journal next to the task file instead of rewriting it")
+  parser.add_argument("--database", metavar="FILE", help="keep the tasks in a SQLite database, writing every change to it")
+  parser.add_argument("--measure-startup", action="store_true", help="print import time and time-to-first-frame as JSON, then exit")
+  parser.add_argument("--merge-rule", choices=["first", "last", "complete", "incomplete"], default="first",
+                      help="which copy of a task found in several imported files to keep (tasklist.MERGE_RULES)")
+  parser.add_argument("--metrics", action="store_true", help="time TaskList, scorer and refresh operations and show them in the status bar")
+  parser.add_argument("--profile", metavar="FILE", help="capture a cProfile of the UI and worker threads and write it to FILE on exit")
+  args = parser.parse_args()
+  if args.metrics:
+    metrics.enable()
+  if args.profile:
+    metrics.startProfile()
+
+  # Show the window before numpy, tkcalendar and the scorer are loaded
   root = tk.Tk()
-  task_list = TaskList()
-  app = Gui(root, task_list)
+  root.title("Fuzzy To-do List")
+  splash = tk.Label(root, text="Loading...")
+  splash.pack(padx=40, pady=40)
+  root.update()
+  first_frame = time.perf_counter()
+
+  from priority_scorer import FuzzyPriorityScorer, DEFAULT_CACHE_FILE
+  from tasklist import TaskList
+  from gui import Gui
+  imported = time.perf_counter()
+
+  # The evaluated priority surface is cached on disk, so later launches only read it back
+  task_list = TaskList(FuzzyPriorityScorer(use_lookup_table=True, cache_file=DEFAULT_CACHE_FILE))
+  splash.destroy()
+  app = Gui(root, task_list, use_journal=args.journal, show_metrics=args.metrics, merge_rule=args.merge_rule,
+            database=args.database)
+
+  if args.measure_startup:
+    root.update()
+    print(json.dumps({
+      "first_frame_seconds": round(first_frame - started, 4),
+      "import_seconds": round(imported - first_frame, 4),
+      "ready_seconds": round(time.perf_counter() - started, 4),
+    }))
+    app.worker.stop()
+    root.destroy()
+    return
   root.mainloop()
+  if args.profile:
+    metrics.stopProfile(args.profile)
+  if args.metrics:
+    print(json.dumps(metrics.stats(), indent=2))
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  main()
@@ -0,0 +1,139 @@
+import bisect
+import contextlib
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+
+# histogram bucket upper bounds in milliseconds (1-2-5 series), the last bucket catches the rest
+HISTOGRAM_BOUNDS_MS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+_enabled = False
+_lock = threading.Lock()
+_operations = {}  # name -> OperationStats
+_profiling = False
+_profilers = {}   # thread id -> cProfile.Profile of each thread profiled since startProfile
+
+class OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def record(self, seconds):
+        milliseconds = seconds * 1000
+        self.count += 1
+        self.total += milliseconds
+        self.min = milliseconds if self.min is None else min(self.min, milliseconds)
+        self.max = milliseconds if self.max is None else max(self.max, milliseconds)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, milliseconds)] += 1
+
+    def toDict(self):
+        bounds = [str(bound) for bound in HISTOGRAM_BOUNDS_MS] + ['inf']
+        return {
+            'count': self.count,
+            'total_ms': self.total,
+            'mean_ms': self.total / self.count if self.count else 0,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'histogram_ms': {bound: count for bound, count in zip(bounds, self.buckets) if count},
+        }
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def isEnabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _operations.clear()
+
+def record(name, seconds):
+    with _lock:
+        if name not in _operations:
+            _operations[name] = OperationStats()
+        _operations[name].record(seconds)
+
+def timed(name):
+    # count and time calls while metrics are enabled; when disabled this costs one global lookup per call
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def stats():
+    # snapshot of every timed operation: counts, totals and latency histograms
+    with _lock:
+        return {name: operation.toDict() for name, operation in _operations.items()}
+
+def summary(names=None):
+    # one line with mean latencies, for a status bar
+    snapshot = stats()
+    names = names or sorted(snapshot)
+    return ' | '.join(f"{name} {snapshot[name]['mean_ms']:.2f} ms x{snapshot[name]['count']}" for name in names if name in snapshot)
+
+def _threadProfiler():
+    with _lock:
+        return _profilers.setdefault(threading.get_ident(), cProfile.Profile())
+
+def startProfile():
+    # capture a cProfile of the calling thread until stopProfile, and of other threads while they run profiled()
+    global _profiling
+    if not _profiling:
+        _profiling = True
+        _threadProfiler().enable()
+
+@contextlib.contextmanager
+def profiled():
+    # profile the calling thread, e.g. a worker, for the duration of the block while a profile is captured
+    if not _profiling:
+        yield
+        return
+    profiler = _threadProfiler()
+    try:
+        profiler.enable()
+    except ValueError:  # Python 3.12+, where the profiler started first already sees every thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+def stopProfile(filename=None, limit=30):
+    # merge the profiles of every thread, dump the raw stats to filename if given,
+    # and return the top functions by cumulative time as text
+    global _profiling
+    if not _profiling:
+        return ''
+    _profiling = False
+    _threadProfiler().disable()
+    with _lock:
+        profilers = list(_profilers.values())
+        _profilers.clear()
+    output = io.StringIO()
+    merged = pstats.Stats(profilers[0], stream=output)
+    for profiler in profilers[1:]:
+        merged.add(profiler)
+    if filename:
+        merged.dump_stats(filename)
+    merged.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
@@ -1,9 +1,142 @@
+import hashlib
+import json
+import os
+import threading
 import numpy as np
-from skfuzzy import control as ctrl
-from skfuzzy import membership as mf
+import metrics
+
+# triangular fit vectors shared by urgency, importance and priority score
+TERMS = {
+    'very low': [0,0,3],
+    'low': [1,3,5],
+    'medium': [3,5,7],
+    'high': [5,7,9],
+    'very high': [7,10,10],
+}
+
+# rule definitions as (urgency, importance) -> priority score
+RULES = [
+    ('very low', 'very low', 'very low'),
+    ('very low', 'low', 'low'),
+    ('very low', 'medium', 'low'),
+    ('very low', 'high', 'medium'),
+    ('very low', 'very high', 'medium'),
+
+    ('low', 'very low', 'low'),
+    ('low', 'low', 'medium'),
+    ('low', 'medium', 'medium'),
+    ('low', 'high', 'high'),
+    ('low', 'very high', 'high'),
+
+    ('medium', 'very low', 'low'),
+    ('medium', 'low', 'medium'),
+    ('medium', 'medium', 'medium'),
+    ('medium', 'high', 'high'),
+    ('medium', 'very high', 'high'),
+
+    ('high', 'very low', 'medium'),
+    ('high', 'low', 'high'),
+    ('high', 'medium', 'high'),
+    ('high', 'high', 'very high'),
+    ('high', 'very high', 'very high'),
+
+    ('very high', 'very low', 'high'),
+    ('very high', 'low', 'very high'),
+    ('very high', 'medium', 'very high'),
+    ('very high', 'high', 'very high'),
+    ('very high', 'very high', 'very high'),
+]
+
+# lookup table grid: integer importance 0-10, urgency rounded to 0.1 in 0-10
+IMPORTANCE_GRID = np.arange(0, 11)
+URGENCY_GRID = np.arange(0, 101) / 10
+LOOKUP_TABLE_TOLERANCE = 1e-6
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'fuzzy-todo-list', 'priority_table.npz')
+
+# the numpy engine agrees with skfuzzy to within this absolute tolerance
+NUMPY_BACKEND_TOLERANCE = 1e-9
+BACKENDS = ('numpy', 'skfuzzy')
+
+# universe of the priority score consequent, sampled like the skfuzzy one
+PRIORITY_UNIVERSE = np.arange(0,10.1,.1)
+BATCH_SIZE = 4096
+
+def rulesHash():
+    # identifies the scorer definition, so cached tables and persisted scores can be trusted
+    definition = {'terms': TERMS, 'rules': RULES, 'defuzzify': 'centroid'}
+    return hashlib.sha256(json.dumps(definition, sort_keys=True).encode()).hexdigest()
+
+def trimf(x, points):
+    # triangular membership evaluated exactly at arbitrary (array) positions
+    a, b, c = points
+    left = np.where(x >= b, 1.0, (x - a) / (b - a)) if b > a else np.where(x >= a, 1.0, 0.0)
+    right = np.where(x <= b, 1.0, (c - x) / (c - b)) if c > b else np.where(x <= c, 1.0, 0.0)
+    return np.clip(np.minimum(left, right), 0.0, 1.0)
+
+def mamdaniScores(importances, urgencies):
+    # pure numpy Mamdani inference: min for AND, max aggregation, centroid defuzzification
+    importances = np.clip(np.asarray(importances, dtype=float), 0, 10)
+    urgencies = np.clip(np.asarray(urgencies, dtype=float), 0, 10)
+    labels = list(TERMS)
+
+    # fuzzify inputs, shape (n, terms)
+    importance_mu = np.stack([trimf(importances, TERMS[label]) for label in labels], axis=1)
+    urgency_mu = np.stack([trimf(urgencies, TERMS[label]) for label in labels], axis=1)
+
+    # rule activations accumulated into a cut level per output term
+    cuts = np.zeros((len(importances), len(labels)))
+    for u, i, p in RULES:
+        activation = np.minimum(urgency_mu[:, labels.index(u)], importance_mu[:, labels.index(i)])
+        np.maximum(cuts[:, labels.index(p)], activation, out=cuts[:, labels.index(p)])
+
+    # upsample the universe with the points where each cut crosses its term, as skfuzzy does
+    crossings = []
+    for k, label in enumerate(labels):
+        a, b, c = TERMS[label]
+        crossings.append(a + cuts[:, k] * (b - a))
+        crossings.append(c - cuts[:, k] * (c - b))
+    x = np.concatenate([np.broadcast_to(PRIORITY_UNIVERSE, (len(cuts), len(PRIORITY_UNIVERSE))), np.stack(crossings, axis=1)], axis=1)
+    x.sort(axis=1)
+
+    # aggregated output membership over the upsampled universe
+    y = np.zeros_like(x)
+    for k, label in enumerate(labels):
+        np.maximum(y, np.minimum(cuts[:, k, None], trimf(x, TERMS[label])), out=y)
+
+    # exact centroid of the piecewise linear membership
+    x1, x2, y1, y2 = x[:, :-1], x[:, 1:], y[:, :-1], y[:, 1:]
+    area = ((x2 - x1) * (y1 + y2) / 2).sum(axis=1)
+    moment = ((x2 - x1) * (x1 * (2 * y1 + y2) + x2 * (y1 + 2 * y2)) / 6).sum(axis=1)
+    return np.divide(moment, area, out=np.zeros_like(area), where=area > 0)
 
 class FuzzyPriorityScorer:
-    def __init__(self):
+    def __init__(self, backend='numpy', use_lookup_table=False, cache_file=None, verify_lookup_table=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown scoring backend: {backend}")
+        self.backend = backend
+        self._simulation = None  # skfuzzy system, built on first use
+        self._lock = threading.RLock()  # the skfuzzy simulation holds state, so one thread uses it at a time
+
+        self.version = rulesHash()
+        self.lookup_table = None
+        if use_lookup_table:
+            self.loadLookupTable(cache_file)
+            if verify_lookup_table and not self.verifyLookupTable():
+                raise ValueError("Priority lookup table does not match the fuzzy system")
+
+    @property
+    def priority_scorer(self):
+        # the skfuzzy control system is the reference backend and is only built when needed
+        with self._lock:
+            if self._simulation is None:
+                self._simulation = self.buildControlSystem()
+            return self._simulation
+
+    def buildControlSystem(self):
+        # skfuzzy pulls in scipy and networkx, so it is only imported when the reference backend is used
+        from skfuzzy import control as ctrl
+        from skfuzzy import membership as mf
+
         # antecedents
         urgency = ctrl.Antecedent(np.arange(0,10.1,.1), "urgency")
         importance = ctrl.Antecedent(np.arange(0,11), "importance")
@@ -12,69 +145,117 @@ class FuzzyPriorityScorer:
         priority_score = ctrl.Consequent(np.arange(0,10.1,.1), "priority score")
 
         # fit vector definitions
-        urgency['very low'] = mf.trimf(urgency.universe, [0,0,3])
-        urgency['low'] = mf.trimf(urgency.universe, [1,3,5])
-        urgency['medium'] = mf.trimf(urgency.universe, [3,5,7])
-        urgency['high'] = mf.trimf(urgency.universe, [5,7,9])
-        urgency['very high'] = mf.trimf(urgency.universe, [7,10,10])
-
-        importance['very low'] = mf.trimf(importance.universe, [0,0,3])
-        importance['low'] = mf.trimf(importance.universe, [1,3,5])
-        importance['medium'] = mf.trimf(importance.universe, [3,5,7])
-        importance['high'] = mf.trimf(importance.universe, [5,7,9])
-        importance['very high'] = mf.trimf(importance.universe, [7,10,10])
-
-        priority_score['very low'] = mf.trimf(priority_score.universe, [0,0,3])
-        priority_score['low'] = mf.trimf(priority_score.universe, [1,3,5])
-        priority_score['medium'] = mf.trimf(priority_score.universe, [3,5,7])
-        priority_score['high'] = mf.trimf(priority_score.universe, [5,7,9])
-        priority_score['very high'] = mf.trimf(priority_score.universe, [7,10,10])
+        for label, points in TERMS.items():
+            urgency[label] = mf.trimf(urgency.universe, points)
+            importance[label] = mf.trimf(importance.universe, points)
+            priority_score[label] = mf.trimf(priority_score.universe, points)
 
         # rule definitions
-        rule1 = ctrl.Rule(urgency['very low'] & importance['very low'], priority_score['very low'])
-        rule2 = ctrl.Rule(urgency['very low'] & importance['low'], priority_score['low'])
-        rule3 = ctrl.Rule(urgency['very low'] & importance['medium'], priority_score['low'])
-        rule4 = ctrl.Rule(urgency['very low'] & importance['high'], priority_score['medium'])
-        rule5 = ctrl.Rule(urgency['very low'] & importance['very high'], priority_score['medium'])
-
-        rule6 = ctrl.Rule(urgency['low'] & importance['very low'], priority_score['low'])
-        rule7 = ctrl.Rule(urgency['low'] & importance['low'], priority_score['medium'])
-        rule8 = ctrl.Rule(urgency['low'] & importance['medium'], priority_score['medium'])
-        rule9 = ctrl.Rule(urgency['low'] & importance['high'], priority_score['high'])
-        rule10 = ctrl.Rule(urgency['low'] & importance['very high'], priority_score['high'])
-
-        rule11 = ctrl.Rule(urgency['medium'] & importance['very low'], priority_score['low'])
-        rule12 = ctrl.Rule(urgency['medium'] & importance['low'], priority_score['medium'])
-        rule13 = ctrl.Rule(urgency['medium'] & importance['medium'], priority_score['medium'])
-        rule14 = ctrl.Rule(urgency['medium'] & importance['high'], priority_score['high'])
-        rule15 = ctrl.Rule(urgency['medium'] & importance['very high'], priority_score['high'])
-
-        rule16 = ctrl.Rule(urgency['high'] & importance['very low'], priority_score['medium'])
-        rule17 = ctrl.Rule(urgency['high'] & importance['low'], priority_score['high'])
-        rule18 = ctrl.Rule(urgency['high'] & importance['medium'], priority_score['high'])
-        rule19 = ctrl.Rule(urgency['high'] & importance['high'], priority_score['very high'])
-        rule20 = ctrl.Rule(urgency['high'] & importance['very high'], priority_score['very high'])
-
-        rule21 = ctrl.Rule(urgency['very high'] & importance['very low'], priority_score['high'])
-        rule22 = ctrl.Rule(urgency['very high'] & importance['low'], priority_score['very high'])
-        rule23 = ctrl.Rule(urgency['very high'] & importance['medium'], priority_score['very high'])
-        rule24 = ctrl.Rule(urgency['very high'] & importance['high'], priority_score['very high'])
-        rule25 = ctrl.Rule(urgency['very high'] & importance['very high'], priority_score['very high'])
-
         rules = [
-            rule1, rule2, rule3, rule4, rule5, 
-            rule6, rule7, rule8, rule9, rule10,
-            rule11, rule12, rule13, rule14, rule15, 
-            rule16, rule17, rule18, rule19, rule20,
-            rule21, rule22, rule23, rule24, rule25
+            ctrl.Rule(urgency[u] & importance[i], priority_score[p]) for u, i, p in RULES
             ]
 
         # fuzzy System
         priority_scorer_ctrl = ctrl.ControlSystem(rules=rules)
-        self.priority_scorer = ctrl.ControlSystemSimulation(control_system=priority_scorer_ctrl)
-        
+        return ctrl.ControlSystemSimulation(control_system=priority_scorer_ctrl)
+
+    def computePriorityScore(self, importance, urgency):
+        # exact evaluation through the skfuzzy control system
+        with self._lock:
+            self.priority_scorer.input["importance"] = importance
+            self.priority_scorer.input["urgency"] = urgency
+            self.priority_scorer.compute()
+            return self.priority_scorer.output["priority score"]
+
+    def computePriorityScores(self, importances, urgencies):
+        # batch evaluation through the configured backend
+        importances = np.asarray(importances, dtype=float)
+        urgencies = np.asarray(urgencies, dtype=float)
+        if self.backend == 'skfuzzy':
+            return np.array([self.computePriorityScore(i, u) for i, u in zip(importances, urgencies)], dtype=float)
+
+        scores = np.empty(len(importances))
+        for start in range(0, len(importances), BATCH_SIZE):  # bounded memory for very large batches
+            end = start + BATCH_SIZE
+            scores[start:end] = mamdaniScores(importances[start:end], urgencies[start:end])
+        return scores
+
+    @metrics.timed('getPriorityScore')
     def getPriorityScore(self, importance, urgency):
-        self.priority_scorer.input["importance"] = importance
-        self.priority_scorer.input["urgency"] = urgency
-        self.priority_scorer.compute()
-        return self.priority_scorer.output["priority score"]
+        if self.lookup_table is not None:
+            return self.lookupPriorityScore(importance, urgency)
+        if self.backend == 'skfuzzy':
+            return self.computePriorityScore(importance, urgency)
+        return float(mamdaniScores([importance], [urgency])[0])
+
+    @metrics.timed('getPriorityScores')
+    def getPriorityScores(self, importances, urgencies):
+        if self.lookup_table is not None:
+            return self.lookupPriorityScores(importances, urgencies)
+        return self.computePriorityScores(importances, urgencies)
+
+    def buildLookupTable(self):
+        # evaluate the whole importance x urgency surface once
+        importances, urgencies = np.meshgrid(IMPORTANCE_GRID, URGENCY_GRID, indexing='ij')
+        table = self.computePriorityScores(importances.ravel(), urgencies.ravel())
+        self.lookup_table = table.reshape(importances.shape)
+        return self.lookup_table
+
+    def loadLookupTable(self, cache_file=None):
+        # reuse a cached surface if it was built from the same rule/membership definitions
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with np.load(cache_file) as cached:
+                    if str(cached['version']) == self.version and cached['table'].shape == (len(IMPORTANCE_GRID), len(URGENCY_GRID)):
+                        self.lookup_table = cached['table']
+                        return self.lookup_table
+            except (OSError, ValueError, KeyError):
+                pass  # unreadable cache, rebuild it below
+
+        self.buildLookupTable()
+        if cache_file:
+            try:
+                self.saveLookupTable(cache_file)
+            except OSError:
+                pass  # the cache is optional, keep using the table built in memory
+        return self.lookup_table
+
+    def saveLookupTable(self, cache_file):
+        # write to a temporary file first so a crash never leaves a half-written cache
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        temp_file = cache_file + '.tmp'
+        with open(temp_file, 'wb') as file:
+            np.savez(file, table=self.lookup_table, version=np.array(self.version))
+        os.replace(temp_file, cache_file)
+
+    def lookupPriorityScore(self, importance, urgency):
+        # bilinear interpolation between grid points, exact on the grid itself
+        i = min(max(float(importance), 0.0), 10.0)
+        u = min(max(float(urgency), 0.0), 10.0) * 10
+
+        i0, u0 = min(int(i), 9), min(int(u), 99)
+        di, du = i - i0, u - u0
+        table = self.lookup_table
+        return ((1 - di) * ((1 - du) * table[i0, u0] + du * table[i0, u0 + 1])
+                + di * ((1 - du) * table[i0 + 1, u0] + du * table[i0 + 1, u0 + 1]))
+
+    def lookupPriorityScores(self, importances, urgencies):
+        # vectorized form of lookupPriorityScore
+        i = np.clip(np.asarray(importances, dtype=float), 0, 10)
+        u = np.clip(np.asarray(urgencies, dtype=float), 0, 10) * 10
+
+        i0, u0 = np.minimum(i.astype(int), 9), np.minimum(u.astype(int), 99)
+        di, du = i - i0, u - u0
+        table = self.lookup_table
+        return ((1 - di) * ((1 - du) * table[i0, u0] + du * table[i0, u0 + 1])
+                + di * ((1 - du) * table[i0 + 1, u0] + du * table[i0 + 1, u0 + 1]))
+
+    def verifyLookupTable(self, tolerance=LOOKUP_TABLE_TOLERANCE):
+        # check every grid point of the table against the exact skfuzzy output
+        if self.lookup_table is None:
+            return False
+        for i, importance in enumerate(IMPORTANCE_GRID):
+            for u, urgency in enumerate(URGENCY_GRID):
+                if abs(self.lookup_table[i, u] - self.computePriorityScore(importance, urgency)) > tolerance:
+                    return False
+        return True
@@ -0,0 +1,283 @@
+from priority_scorer import FuzzyPriorityScorer, DEFAULT_CACHE_FILE
+from tasklist import TaskList, writeJsonAtomic
+from task import Task
+import argparse
+import asyncio
+import datetime
+import http
+import json
+import os
+import re
+import signal
+import sys
+import urllib.parse
+
+BATCH_DELAY = 0.002     # seconds edits to a list are collected before they are rescored together
+SAVE_DELAY = 1.0        # seconds a changed list waits before it is written, so bursts are saved once
+DEFAULT_TOP = 20
+LIST_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+EDITABLE_FIELDS = ('task_name', 'importance', 'deadline', 'is_complete')
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class HostedList:
+    # one named TaskList; the lock is held while the list is changed, read or rescored
+    def __init__(self, name, task_list:TaskList, filename):
+        self.name = name
+        self.task_list = task_list
+        self.filename = filename
+        self.lock = asyncio.Lock()
+        self.rescored = None    # future of the pending batched rescore
+        self.save_task = None   # pending delayed save
+
+class TaskService:
+    # many TaskLists in one process, all scored by one shared scorer
+    def __init__(self, directory, scorer:FuzzyPriorityScorer=None, batch_delay=BATCH_DELAY, save_delay=SAVE_DELAY):
+        self.directory = directory
+        self.scorer = scorer or FuzzyPriorityScorer(use_lookup_table=True, cache_file=DEFAULT_CACHE_FILE)
+        self.batch_delay = batch_delay
+        self.save_delay = save_delay
+        self.lists = {}     # name -> HostedList
+        self._loading = {}  # name -> task loading that list
+        os.makedirs(directory, exist_ok=True)
+
+    def listNames(self):
+        stored = {os.path.splitext(filename)[0] for filename in os.listdir(self.directory) if filename.endswith('.json')}
+        return sorted(stored | set(self.lists))
+
+    async def getList(self, name):
+        # lists are loaded from <directory>/<name>.json on first use
+        if not LIST_NAME.match(name):
+            raise HttpError(400, f"Invalid list name: {name}")
+        if name in self.lists:
+            return self.lists[name]
+        if name not in self._loading:
+            self._loading[name] = asyncio.ensure_future(self._loadList(name))
+        try:
+            return await asyncio.shield(self._loading[name])
+        finally:
+            self._loading.pop(name, None)
+
+    async def _loadList(self, name):
+        filename = os.path.join(self.directory, name + '.json')
+        task_list = TaskList(self.scorer)
+        await asyncio.to_thread(task_list.loadFromJson, filename)  # urgencies move on while a list is not served
+        task_list.defer_rescoring = True  # edits are rescored in batches by _rescore
+        hosted = self.lists[name] = HostedList(name, task_list, filename)
+        return hosted
+
+    async def change(self, name, fn):
+        # apply fn(task_list) now, and answer once the batch it joined was rescored
+        hosted = await self.getList(name)
+        async with hosted.lock:
+            result = fn(hosted.task_list)
+        await self._rescoreSoon(hosted)
+        return result
+
+    async def read(self, name, fn):
+        hosted = await self.getList(name)
+        if hosted.rescored is not None:
+            await asyncio.shield(hosted.rescored)
+        async with hosted.lock:
+            await asyncio.to_thread(hosted.task_list.rescoreDue)  # urgencies that moved since the last request
+            return fn(hosted.task_list)
+
+    async def _rescoreSoon(self, hosted:HostedList):
+        if hosted.rescored is None:
+            hosted.rescored = asyncio.get_running_loop().create_future()
+            asyncio.ensure_future(self._rescore(hosted))
+        await asyncio.shield(hosted.rescored)
+
+    async def _rescore(self, hosted:HostedList):
+        await asyncio.sleep(self.batch_delay)  # let concurrent requests join the batch
+        rescored, hosted.rescored = hosted.rescored, None
+        try:
+            async with hosted.lock:
+                await asyncio.to_thread(rescoreList, hosted.task_list)
+        except Exception as e:
+            rescored.set_exception(e)
+            rescored.exception()  # retrieved here too, in case no request waits on it any more
+            return
+        rescored.set_result(None)
+        if hosted.save_task is None:
+            hosted.save_task = asyncio.ensure_future(self._saveLater(hosted))
+
+    async def _saveLater(self, hosted:HostedList):
+        await asyncio.sleep(self.save_delay)
+        hosted.save_task = None
+        await self.save(hosted)
+
+    async def save(self, hosted:HostedList):
+        # snapshot under the lock, write the file without holding it
+        async with hosted.lock:
+            data = await asyncio.to_thread(hosted.task_list.toJsonData)
+        await asyncio.to_thread(writeJsonAtomic, hosted.filename, data)
+
+    async def saveAll(self):
+        for hosted in list(self.lists.values()):
+            if hosted.save_task is not None:
+                hosted.save_task.cancel()
+                hosted.save_task = None
+                await self.save(hosted)
+
+    # endpoints
+    async def dispatch(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        parts = [urllib.parse.unquote(part) for part in url.path.strip('/').split('/')]
+        data = json.loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object")
+
+        if parts == ['lists'] and method == 'GET':
+            return 200, {'lists': self.listNames()}
+        if len(parts) < 3 or parts[0] != 'lists' or parts[2] != 'tasks':
+            raise HttpError(404, f"No such resource: {url.path}")
+        name = parts[1]
+
+        if len(parts) == 3:
+            if method == 'GET':
+                limit = int(query.get('limit', [DEFAULT_TOP])[0])
+                offset = int(query.get('offset', [0])[0])
+                return 200, await self.read(name, lambda task_list: {
+                    'total': len(task_list),
+                    'tasks': [task.toDict() for task in task_list.tasksInRange(offset, offset + limit)]})
+            if method == 'POST':
+                task = taskFromRequest(data)
+                return 201, await self.change(name, lambda task_list: {'task_id': task_list.addTask(task)})
+        elif len(parts) in (4, 5):
+            task_id = parseTaskId(parts[3])
+            action = parts[4] if len(parts) == 5 else None
+            if action is None and method == 'GET':
+                return 200, await self.read(name, lambda task_list: task_list.getTask(task_id).toDict())
+            if action is None and method == 'DELETE':
+                return 200, await self.change(name, lambda task_list: task_list.deleteTask(task_id).toDict())
+            if action is None and method == 'PATCH':
+                changes = changesFromRequest(data)
+            elif action == 'complete' and method == 'POST':
+                changes = {'is_complete': bool(data.get('is_complete', True))}
+            else:
+                raise HttpError(405, f"{method} not allowed on {url.path}")
+            # edits answer with the rescored task
+            await self.change(name, lambda task_list: task_list.updateTask(task_id, **changes))
+            return 200, await self.read(name, lambda task_list: task_list.getTask(task_id).toDict())
+        raise HttpError(405, f"{method} not allowed on {url.path}")
+
+    async def respond(self, method, target, body):
+        try:
+            return await self.dispatch(method, target, body)
+        except HttpError as e:
+            return e.status, {'error': str(e)}
+        except KeyError as e:
+            return 404, {'error': f"No such task: {e.args[0]}"}
+        except (ValueError, TypeError, OverflowError) as e:  # bad JSON, fields or query parameters
+            return 400, {'error': str(e)}
+
+    async def handleConnection(self, reader, writer):
+        # a small HTTP/1.1 server: JSON bodies with Content-Length, keep-alive by default
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.respond(method, target, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                content = json.dumps(payload).encode()
+                writer.write((f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                              f"Content-Type: application/json\r\nContent-Length: {len(content)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client went away or sent something that is not HTTP
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080, ready=None):
+        # serve until SIGINT or SIGTERM, then save every changed list
+        server = await asyncio.start_server(self.handleConnection, host, port)
+        serving = asyncio.current_task()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(signum, serving.cancel)
+            except NotImplementedError:  # Windows, where Ctrl+C raises KeyboardInterrupt instead
+                pass
+        if ready:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.saveAll()
+
+def parseTaskId(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(404, f"No such task: {value}")
+
+def rescoreList(task_list:TaskList):
+    task_list.rescoreDirty()
+    task_list.rescoreDue()
+
+def parseImportance(value):
+    importance = int(value)
+    if not 0 <= importance <= 10:
+        raise HttpError(400, f"importance must be between 0 and 10, not {importance}")
+    return importance
+
+def parseDeadline(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+def taskFromRequest(data):
+    if 'task_name' not in data or 'importance' not in data:
+        raise HttpError(400, "task_name and importance are required")
+    task = Task(str(data['task_name']), parseImportance(data['importance']), parseDeadline(data.get('deadline')))
+    task.is_complete = bool(data.get('is_complete', False))
+    return task
+
+def changesFromRequest(data):
+    changes = {}
+    for field, value in data.items():
+        if field not in EDITABLE_FIELDS:
+            raise HttpError(400, f"Unknown task field: {field}")
+        changes[field] = {'deadline': parseDeadline, 'importance': parseImportance, 'is_complete': bool, 'task_name': str}[field](value)
+    return changes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve many named task lists over HTTP/JSON")
+    parser.add_argument('--directory', default='lists', help="where each list is kept as <name>.json")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--scorer', choices=['numpy', 'skfuzzy', 'lookup'], default='lookup')
+    args = parser.parse_args(argv)
+
+    scorer = FuzzyPriorityScorer(use_lookup_table=True, cache_file=DEFAULT_CACHE_FILE) if args.scorer == 'lookup' \
+        else FuzzyPriorityScorer(backend=args.scorer)
+    service = TaskService(args.directory, scorer)
+    try:
+        asyncio.run(service.serve(args.host, args.port,
+                                  lambda server: print(f"Serving {args.directory} on http://{args.host}:{args.port}", file=sys.stderr)))
+    except KeyboardInterrupt:
+        pass  # serve() saved every changed list on the way out
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
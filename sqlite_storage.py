@@ -0,0 +1,223 @@
+from priority_scorer import FuzzyPriorityScorer
+from storage import TaskStorage
+from task import Task
+from task_store import ColumnBuilder, toMicroseconds
+from task_files import PROGRESS_INTERVAL
+from tasklist import TaskList, urgencyFromDeadlines
+import contextlib
+import datetime
+import json
+import numpy as np
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY,
+    task_name TEXT NOT NULL,
+    importance INTEGER NOT NULL,
+    deadline TEXT,
+    urgency REAL,
+    priority_score REAL,
+    is_complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority_score DESC);
+CREATE INDEX IF NOT EXISTS tasks_deadline ON tasks (deadline);
+CREATE INDEX IF NOT EXISTS tasks_complete ON tasks (is_complete);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+COLUMNS = ('task_id', 'task_name', 'importance', 'deadline', 'urgency', 'priority_score', 'is_complete')
+TASK_FIELDS = ('task_name', 'importance', 'deadline', 'is_complete')  # what updateTask may change
+
+class SqliteStorage(TaskStorage):
+    # tasks in a SQLite database: paging by priority, deadline ranges and single-row edits are answered by
+    # the database without a loaded list; load() fills a TaskList with every task for the GUI
+    def __init__(self, filename='tasks.db', priority_scorer:FuzzyPriorityScorer=None):
+        self.filename = filename
+        # the GUI opens the database on the UI thread and writes to it from its worker, one at a time
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.priority_scorer = priority_scorer  # scores rows edited with no list attached, built when needed
+        self._batch = None  # pending writes while inside batch()
+
+    def _row(self, task:Task):
+        return (task.task_id, task.task_name, task.importance,
+                task.deadline.isoformat() if task.deadline else None,
+                task.urgency, task.priority_score, int(task.is_complete))
+
+    def _task(self, row):
+        task_id, task_name, importance, deadline, urgency, priority_score, is_complete = row
+        task = Task(task_name, importance, datetime.datetime.fromisoformat(deadline) if deadline else None)
+        task.task_id = task_id
+        task.urgency = urgency
+        task.priority_score = priority_score
+        task.is_complete = bool(is_complete)
+        return task
+
+    def _execute(self, sql, rows):
+        # inside batch() writes are collected and flushed in one transaction
+        if self._batch is not None:
+            self._batch.append((sql, rows))
+            return
+        with self.connection:
+            self.connection.executemany(sql, rows)
+
+    @contextlib.contextmanager
+    def batch(self):
+        if self._batch is not None:  # already batching, join the outer transaction
+            yield self
+            return
+        self._batch = []
+        try:
+            yield self
+            with self.connection:
+                for sql, rows in self._batch:
+                    self.connection.executemany(sql, rows)
+        finally:
+            self._batch = None
+
+    def recordPut(self, task:Task):
+        self.recordPuts([task])
+
+    def recordPuts(self, tasks):
+        self._execute(f"INSERT OR REPLACE INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                      [self._row(task) for task in tasks])
+
+    def recordDelete(self, task_id):
+        self._execute("DELETE FROM tasks WHERE task_id = ?", [(task_id,)])
+
+    def recordScores(self, tasks):
+        self._execute("UPDATE tasks SET urgency = ?, priority_score = ? WHERE task_id = ?",
+                      [(task.urgency, task.priority_score, task.task_id) for task in tasks])
+
+    def updateTask(self, task_id, **changes):
+        # edit a single row. With a list attached the edit goes through it, which rescores the task and writes
+        # it back; otherwise the row is rescored here without loading the others
+        for field in changes:
+            if field not in TASK_FIELDS:
+                raise ValueError(f"Unknown task field: {field}")
+        if self.task_list is not None:
+            self.task_list.updateTask(task_id, **changes)
+            return
+        task = self.getTask(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        closest_before = self._closestDeadline(task, task_id)
+        for field, value in changes.items():
+            setattr(task, field, value)
+        closest = self._closestDeadline(task, task_id)
+        if closest != closest_before:  # every urgency is relative to the closest deadline
+            rows = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM tasks "
+                                           "WHERE is_complete = 0 AND deadline IS NOT NULL AND task_id != ?", (task_id,))
+            tasks = [task] + [self._task(row) for row in rows]
+        else:
+            tasks = [task]
+        self._rescore(tasks, closest)
+        with self.batch():
+            self.recordPut(task)
+            self.recordScores(tasks)
+
+    def _closestDeadline(self, task:Task, task_id):
+        # closest deadline of the incomplete tasks, with task in place of the stored row task_id
+        closest = self.connection.execute("SELECT MIN(deadline) FROM tasks WHERE is_complete = 0 "
+                                          "AND deadline IS NOT NULL AND task_id != ?", (task_id,)).fetchone()[0]
+        closest = datetime.datetime.fromisoformat(closest) if closest else None
+        if task.deadline and not task.is_complete and (closest is None or task.deadline < closest):
+            closest = task.deadline
+        return closest
+
+    def _rescore(self, tasks, closest):
+        # urgencies and priority scores as a TaskList scored now would give them
+        if self.priority_scorer is None:
+            self.priority_scorer = FuzzyPriorityScorer()
+        now = toMicroseconds(datetime.datetime.now())
+        urgencies = np.zeros(len(tasks))
+        pending = [k for k, task in enumerate(tasks) if task.deadline and not task.is_complete]
+        if closest is not None and pending:
+            deadlines = np.array([toMicroseconds(tasks[k].deadline) for k in pending], dtype=np.int64)
+            urgencies[pending] = urgencyFromDeadlines(deadlines, now, (toMicroseconds(closest) - now) / 10**6)
+        scores = self.priority_scorer.getPriorityScores([task.importance for task in tasks], urgencies)
+        for task, urgency, score in zip(tasks, urgencies.tolist(), scores.tolist()):
+            task.urgency = urgency
+            task.priority_score = 0 if task.is_complete else score
+
+    def getTask(self, task_id):
+        row = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self._task(row) if row else None
+
+    def topTasks(self, limit, offset=0, include_complete=False):
+        # page through tasks by descending priority using the priority index
+        where = "" if include_complete else "WHERE is_complete = 0"
+        rows = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM tasks {where} ORDER BY priority_score DESC, task_id LIMIT ? OFFSET ?",
+            (limit, offset))
+        return [self._task(row) for row in rows]
+
+    def tasksDueBetween(self, start:datetime.datetime, end:datetime.datetime, include_complete=False):
+        where = "" if include_complete else "AND is_complete = 0"
+        rows = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE deadline >= ? AND deadline < ? {where} ORDER BY deadline",
+            (start.isoformat(), end.isoformat()))
+        return [self._task(row) for row in rows]
+
+    def countTasks(self):
+        return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def load(self, task_list:TaskList, progress=None):
+        # fill the list with every row, read as columns rather than a Task per row; stored scores from the
+        # same scorer are kept, so only tasks whose urgency moved since are scored again.
+        # progress(done, total) is called while rows are read and may raise to abort the load
+        self.detach()
+        total = self.countTasks()
+        builder = ColumnBuilder()
+        for row in self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM tasks"):
+            builder.append(dict(zip(COLUMNS, row)))
+            if progress and len(builder) % PROGRESS_INTERVAL == 0:
+                progress(len(builder), total)
+        task_list.loadColumns(builder.build(), self._scorerVersion(), trust_persisted_scores=True, replace=True)
+        self.attach(task_list)
+        with self.batch():
+            self.recordScores(task_list.tasks)  # urgencies have moved on since they were stored
+            self._setScorerVersion(task_list)
+
+    def _scorerVersion(self):
+        version = self.connection.execute("SELECT value FROM meta WHERE key = 'scorer_version'").fetchone()
+        return version[0] if version else None
+
+    def _setScorerVersion(self, task_list:TaskList):
+        self._execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('scorer_version', ?)",
+                      [(task_list.priority_scorer.version,)])
+
+    def writeTaskList(self, task_list:TaskList):
+        # replace the database contents with the list in one transaction
+        with self.batch():
+            self._execute("DELETE FROM tasks", [()])
+            self.recordPuts(task_list.tasks)
+            self._setScorerVersion(task_list)
+
+    def importFile(self, filename, task_list:TaskList=None, progress=None):
+        # replace the database contents with a task file in any format, scored through a TaskList;
+        # a list attached to this storage stays attached and holds the imported tasks
+        task_list = task_list or TaskList()
+        attached = self.task_list is task_list
+        self.detach()
+        task_list.loadFromFile(filename, replace=True, progress=progress)
+        self.writeTaskList(task_list)
+        if attached:
+            self.attach(task_list)
+        return task_list
+
+    def importJson(self, filename, task_list:TaskList=None):
+        return self.importFile(filename, task_list)
+
+    def exportJson(self, filename):
+        rows = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM tasks ORDER BY priority_score DESC, task_id")
+        with open(filename, 'w') as file:
+            json.dump({
+                'scorer_version': self._scorerVersion(),
+                'tasks': [self._task(row).toDict() for row in rows]
+            }, file, indent=4)
+
+    def close(self):
+        super().close()
+        self.connection.close()
@@ -0,0 +1,39 @@
+import abc
+
+class TaskStorage(abc.ABC):
+    # base class for storage backends that a TaskList reports its changes to
+    task_list = None
+
+    def attach(self, task_list):
+        self.task_list = task_list
+        task_list.storage = self
+
+    def detach(self):
+        if self.task_list is not None and self.task_list.storage is self:
+            self.task_list.storage = None
+        self.task_list = None
+
+    @abc.abstractmethod
+    def recordPut(self, task):
+        # a task was added or edited
+        pass
+
+    def recordPuts(self, tasks):
+        for task in tasks:
+            self.recordPut(task)
+
+    @abc.abstractmethod
+    def recordDelete(self, task_id):
+        pass
+
+    def recordScores(self, tasks):
+        # urgency and priority of these tasks were recomputed; only backends that query by score need them
+        pass
+
+    @abc.abstractmethod
+    def load(self, task_list):
+        # fill the list from storage and attach to it
+        pass
+
+    def close(self):
+        self.detach()
@@ -1,19 +1,94 @@
 import datetime
 
+FIELDS = ('task_id', 'task_name', 'importance', 'deadline', 'urgency', 'priority_score', 'is_complete')
+
+def _field(field):
+    # reads and writes go to the TaskStore row once the task belongs to a TaskList
+    def get(task):
+        if task._store is None:
+            return task._values[field]
+        return task._store.getField(task._row, field)
+
+    def set(task, value):
+        if task._store is None:
+            task._values[field] = value
+        else:
+            task._store.setField(task._row, field, value)
+    return property(get, set)
+
 class Task:
+    # a lightweight view over one TaskStore row; a new task keeps its own values until it is added to a list
+    __slots__ = ('_store', '_row', '_values')
+
     def __init__(self, task_name:str, importance:int, deadline:datetime.datetime=None):
-        self.task_name = task_name
-        self.importance = importance
-        self.deadline = deadline
-        self.urgency = 0 if self.deadline == None else None # if there is no deadline, urgency score is automatically set to 0
-        self.priority_score = None
-        self.is_complete = False
-        
+        self._store = None
+        self._row = None
+        self._values = {
+            'task_id': None, # assigned by the TaskList, stable across reorders
+            'task_name': task_name,
+            'importance': importance,
+            'deadline': deadline,
+            'urgency': 0 if deadline == None else None, # if there is no deadline, urgency score is automatically set to 0
+            'priority_score': None,
+            'is_complete': False,
+        }
+
+    @classmethod
+    def view(cls, store, row):
+        task = cls.__new__(cls)
+        task._store = store
+        task._row = row
+        task._values = None
+        return task
+
+    def attach(self, store, row):
+        # become a view of a store row that already holds the task's values
+        self._store = store
+        self._row = row
+        self._values = None
+
+    def detach(self):
+        # copy the row back into the task, so it outlives the row being deleted or reused
+        self._values = {field: getattr(self, field) for field in FIELDS}
+        self._store = None
+        self._row = None
+
+    @property
+    def task_id(self):
+        return self._values['task_id'] if self._store is None else self._row
+
+    @task_id.setter
+    def task_id(self, value):
+        if self._store is not None:
+            raise AttributeError("task_id of a task in a TaskList cannot change")
+        self._values['task_id'] = value
+
+    task_name = _field('task_name')
+    importance = _field('importance')
+    deadline = _field('deadline')
+    urgency = _field('urgency')
+    priority_score = _field('priority_score')
+    is_complete = _field('is_complete')
+
     def triggerCompletion(self):
         self.is_complete = True if self.is_complete == False else False
-        
+
     def toDict(self):
-        task_dict = self.__dict__.copy()
-        if self.deadline:
-            task_dict['deadline'] = self.deadline.isoformat()  # Convert datetime to string
+        task_dict = {field: getattr(self, field) for field in FIELDS}
+        if task_dict['deadline']:
+            task_dict['deadline'] = task_dict['deadline'].isoformat()  # Convert datetime to string
         return task_dict
+
+    @classmethod
+    def fromDict(cls, task_dict):
+        deadline = datetime.datetime.fromisoformat(task_dict['deadline']) if task_dict['deadline'] else None
+        task = cls(
+            task_name=task_dict['task_name'],
+            importance=task_dict['importance'],
+            deadline=deadline
+        )
+        task.task_id = task_dict.get('task_id')
+        task.urgency = task_dict['urgency']
+        task.priority_score = task_dict['priority_score']
+        task.is_complete = task_dict['is_complete']
+        return task
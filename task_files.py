@@ -0,0 +1,283 @@
+from task_store import TaskColumns, ColumnBuilder
+import concurrent.futures
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import struct
+import numpy as np
+
+PROGRESS_INTERVAL = 10000  # tasks read between progress reports
+BLOCK_SIZE = 1 << 20       # characters read at a time while streaming a JSON document
+WRITE_BATCH = 10000        # tasks turned into dicts and written at a time
+SEPARATORS = re.compile(r'[\s,]*')
+TASKS_ARRAY = re.compile(r'"tasks"\s*:\s*\[')
+SCORER_VERSION = re.compile(r'"scorer_version"\s*:\s*"([^"]*)"')
+# readMany workers start from a clean interpreter rather than a fork of one running UI and worker threads
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# file extension -> format; anything else is read and written as JSON
+FORMATS = {'.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.tasks': 'binary'}
+
+# binary format: a header, fixed-width records in priority order, then the string table
+# as len(names) + 1 byte offsets into a UTF-8 blob; sections start on 8 byte boundaries
+MAGIC = b'FTLTASKS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sH2x64sQQQ4x')  # magic, version, scorer version, task count, name count, blob bytes
+RECORD = np.dtype([
+    ('task_id', '<i8'),
+    ('deadline', '<i8'),        # microseconds since the epoch, NO_DEADLINE if none
+    ('urgency', '<f8'),         # NaN if not computed
+    ('priority_score', '<f8'),  # NaN if not computed
+    ('name', '<u4'),            # index into the string table
+    ('importance', 'i1'),
+    ('is_complete', 'u1'),
+])
+
+def fileFormat(filename):
+    return FORMATS.get(os.path.splitext(filename)[1].lower(), 'json')
+
+def padded(size):
+    return (size + 7) // 8 * 8
+
+def writeAtomic(filename, write, mode='w'):
+    # write(file) into a temporary file and rename it over the target, so a crash never leaves a torn file
+    temp_file = filename + '.tmp'
+    with open(temp_file, mode) as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, filename)
+
+def reportProgress(progress, done, file, size):
+    # the total is estimated from how far into the file reading has got
+    position = file.buffer.tell() if hasattr(file, 'buffer') else file.tell()
+    progress(done, max(done, round(done * size / position)) if position else done)
+
+# JSON, the format of TaskList.saveToJson
+def iterJsonTasks(file, meta=None):
+    # stream the items of the task array without loading the whole document; saved files are
+    # {"scorer_version": ..., "tasks": [...]}, older ones a bare list. The scorer version is put in meta.
+    decoder = json.JSONDecoder()
+    buffer = ''
+
+    def more():
+        nonlocal buffer
+        block = file.read(BLOCK_SIZE)
+        buffer += block
+        return bool(block)
+
+    while not buffer.strip() and more():
+        pass
+    if not buffer.strip():
+        return
+    if buffer.lstrip()[0] == '{':
+        while not TASKS_ARRAY.search(buffer):
+            if not more():
+                raise ValueError("No task array in JSON input")
+        match = TASKS_ARRAY.search(buffer)
+        version = SCORER_VERSION.search(buffer, 0, match.start())
+        if meta is not None and version:
+            meta['scorer_version'] = version.group(1)
+        position = match.end()
+    else:
+        position = buffer.index('[') + 1
+
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position == len(buffer):
+            if not more():
+                raise ValueError("Unterminated task array in JSON input")
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            task_data, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not more():
+                raise
+            continue
+        yield task_data
+        if position > BLOCK_SIZE:
+            buffer, position = buffer[position:], 0
+
+def writeJson(file, columns:TaskColumns, scorer_version):
+    # same text as json.dump({'scorer_version': ..., 'tasks': [...]}, indent=4), written a batch at a time
+    # (older versions wrote, and only read, a bare task list; iterJsonTasks reads both)
+    file.write('{\n    "scorer_version": ' + json.dumps(scorer_version) + ',\n    "tasks": [')
+    for start in range(0, len(columns), WRITE_BATCH):
+        batch = json.dumps(columns.toDicts(start, start + WRITE_BATCH), indent=4)
+        file.write((',' if start else '') + batch[1:-2].replace('\n', '\n    '))
+    file.write('\n    ]\n}' if len(columns) else ']\n}')
+
+# JSON lines: an optional {"scorer_version": ...} line, then one task per line
+def iterJsonLinesTasks(file, meta=None):
+    for line in file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if 'task_name' in record:
+            yield record
+        elif meta is not None and 'scorer_version' in record:
+            meta['scorer_version'] = record['scorer_version']
+
+def writeJsonLines(file, columns:TaskColumns, scorer_version):
+    file.write(json.dumps({'scorer_version': scorer_version}) + '\n')
+    for start in range(0, len(columns), WRITE_BATCH):
+        file.writelines(json.dumps(task_dict) + '\n' for task_dict in columns.toDicts(start, start + WRITE_BATCH))
+
+def readStream(filename, iterTasks, progress=None):
+    # build columns task by task, so memory follows the tasks rather than a parsed document
+    meta = {}
+    builder = ColumnBuilder()
+    size = os.path.getsize(filename)
+    with open(filename, 'r') as file:
+        for task_dict in iterTasks(file, meta):
+            builder.append(task_dict)
+            if progress and len(builder) % PROGRESS_INTERVAL == 0:
+                reportProgress(progress, len(builder), file, size)
+    if progress:
+        progress(len(builder), len(builder))
+    return builder.build(), meta.get('scorer_version')
+
+# binary
+class TaskFile:
+    # a binary task file mapped into memory; records are read and names decoded only when used
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"Not a task file: {filename}")
+        magic, version, scorer_version, count, name_count, blob_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a task file of version {FORMAT_VERSION}: {filename}")
+        self.scorer_version = scorer_version.rstrip(b'\0').decode() or None
+
+        offset = HEADER.size
+        self.records = np.frombuffer(self._map, dtype=RECORD, count=count, offset=offset)
+        offset += padded(count * RECORD.itemsize)
+        self._name_offsets = np.frombuffer(self._map, dtype='<u8', count=name_count + 1, offset=offset)
+        self._blob_start = offset + (name_count + 1) * 8
+        self._names = {}  # string table index -> decoded name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def name(self, index):
+        if index not in self._names:
+            start, stop = self._name_offsets[index:index + 2].tolist()
+            self._names[index] = self._map[self._blob_start + start:self._blob_start + stop].decode('utf-8')
+        return self._names[index]
+
+    def __getitem__(self, index):
+        # task dicts in the Task.toDict form; records are in priority order, so file[:n] is the top n
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return self.columns(start, max(start, stop)).toDicts() if step == 1 else [self[k] for k in range(start, stop, step)]
+        index = range(len(self))[index]
+        return self.columns(index, index + 1).toDicts()[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), WRITE_BATCH):
+            yield from self.columns(start, start + WRITE_BATCH).toDicts()
+
+    def names(self):
+        # the whole string table, decoded in one pass
+        blob = self._map[self._blob_start:self._blob_start + int(self._name_offsets[-1])]
+        offsets = self._name_offsets.tolist()
+        return [blob[start:stop].decode('utf-8') for start, stop in zip(offsets, offsets[1:])]
+
+    def columns(self, start=0, stop=None):
+        # copy a range of records out of the map, with the names they use
+        records = self.records[start:stop]
+        if len(records) == len(self):
+            names, name_indices = self.names(), records['name']
+        else:
+            used, name_indices = np.unique(records['name'], return_inverse=True)
+            names = [self.name(index) for index in used.tolist()]
+        return TaskColumns(records['task_id'].copy(), names, name_indices.astype(np.int32), records['importance'].copy(), records['deadline'].copy(),
+                           records['urgency'].copy(), records['priority_score'].copy(), records['is_complete'].astype(bool))
+
+    def close(self):
+        # arrays handed out by records must not be used after this
+        self.records = self._name_offsets = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+def writeBinary(file, columns:TaskColumns, scorer_version):
+    encoded = [name.encode('utf-8') for name in columns.names]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    records = np.empty(len(columns), dtype=RECORD)
+    records['task_id'] = columns.task_ids
+    records['deadline'] = columns.deadlines
+    records['urgency'] = columns.urgencies
+    records['priority_score'] = columns.priority_scores
+    records['name'] = columns.name_indices
+    records['importance'] = columns.importances
+    records['is_complete'] = columns.completes
+
+    file.write(HEADER.pack(MAGIC, FORMAT_VERSION, (scorer_version or '').encode(), len(columns), len(encoded), int(offsets[-1])))
+    file.write(records.tobytes())
+    file.write(b'\0' * (padded(records.nbytes) - records.nbytes))
+    file.write(offsets.tobytes())
+    file.write(b''.join(encoded))
+
+def readBinary(filename, progress=None):
+    with TaskFile(filename) as task_file:
+        columns = task_file.columns()
+        scorer_version = task_file.scorer_version
+    if progress:
+        progress(len(columns), len(columns))
+    return columns, scorer_version
+
+def readColumns(filename, progress=None):
+    # (columns, scorer version) of a task file in any of the formats
+    file_format = fileFormat(filename)
+    if file_format == 'binary':
+        return readBinary(filename, progress)
+    return readStream(filename, iterJsonLinesTasks if file_format == 'jsonl' else iterJsonTasks, progress)
+
+def readMany(filenames, workers=None, progress=None):
+    # [(columns, scorer version)] of several task files in any of the formats, parsed side by side in worker
+    # processes; progress(done, total) is called as files finish, with the total estimated from their sizes
+    workers = min(workers or os.cpu_count() or 1, len(filenames))
+    executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(START_METHOD)) \
+        if workers > 1 else None
+    try:
+        if executor:
+            futures = {executor.submit(readColumns, filename): k for k, filename in enumerate(filenames)}
+            finished = ((futures[future], future.result()) for future in concurrent.futures.as_completed(futures))
+        else:
+            finished = ((k, readColumns(filename)) for k, filename in enumerate(filenames))
+
+        sizes = [os.path.getsize(filename) for filename in filenames]
+        results = [None] * len(filenames)
+        done_tasks = done_bytes = 0
+        for k, result in finished:
+            results[k] = result
+            done_tasks += len(result[0])
+            done_bytes += sizes[k]
+            if progress:
+                progress(done_tasks, round(done_tasks * sum(sizes) / done_bytes) if done_bytes else done_tasks)
+        return results
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)  # files not started yet are skipped after an error or abort
+
+def writeColumns(filename, columns:TaskColumns, scorer_version):
+    file_format = fileFormat(filename)
+    write = {'json': writeJson, 'jsonl': writeJsonLines, 'binary': writeBinary}[file_format]
+    writeAtomic(filename, lambda file: write(file, columns, scorer_version), 'wb' if file_format == 'binary' else 'w')
@@ -0,0 +1,167 @@
+from task_store import TaskStore, NO_DEADLINE, toMicroseconds
+import bisect
+import collections
+import numpy as np
+
+TRIGRAM = 3  # text queries at least this long are answered from the trigram index
+REBUILD_SHARE = 32  # batches over 1/REBUILD_SHARE of a SortedIndex are merged by a sort instead of binary searches
+
+def trigrams(text):
+    return {text[k:k + TRIGRAM] for k in range(len(text) - TRIGRAM + 1)}
+
+class SortedIndex:
+    # (key, id) pairs kept sorted in two parallel arrays, equal keys ordered by id;
+    # changes binary search their positions and cost one array copy per batch
+    def __init__(self, key_dtype):
+        self.keys = np.empty(0, dtype=key_dtype)
+        self.ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def assign(self, keys, ids):
+        order = np.lexsort((ids, keys))
+        self.keys = keys[order]
+        self.ids = ids[order]
+
+    def _positions(self, keys, ids):
+        # where (key, id) pairs sit in, or belong in, the index
+        starts = np.searchsorted(self.keys, keys, 'left')
+        stops = np.searchsorted(self.keys, keys, 'right')
+        for k in np.flatnonzero(stops > starts):  # equal keys are ordered by id
+            starts[k] += np.searchsorted(self.ids[starts[k]:stops[k]], ids[k])
+        return starts
+
+    def insert(self, keys, ids):
+        if len(ids) * REBUILD_SHARE > len(self.ids):
+            self.assign(np.concatenate((self.keys, keys)), np.concatenate((self.ids, ids)))
+            return
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        positions = self._positions(keys, ids)
+        self.keys = np.insert(self.keys, positions, keys)
+        self.ids = np.insert(self.ids, positions, ids)
+
+    def remove(self, keys, ids):
+        # raises KeyError, leaving the index as it was, if a pair is not filed
+        if not len(ids):
+            return
+        if len(ids) * REBUILD_SHARE > len(self.ids):  # an id is filed once, so it can be matched by id alone
+            kept = ~np.isin(self.ids, ids)
+            order = np.lexsort((ids, keys))
+            if len(self.ids) - np.count_nonzero(kept) != len(ids) or (self.keys[~kept] != keys[order]).any() \
+                    or (self.ids[~kept] != ids[order]).any():
+                raise KeyError('(key, id) pairs not in the index')
+            self.keys, self.ids = self.keys[kept], self.ids[kept]
+            return
+        positions = self._positions(keys, ids)
+        found = positions < len(self.ids)
+        found[found] = (self.keys[positions[found]] == keys[found]) & (self.ids[positions[found]] == ids[found])
+        if not found.all():
+            k = np.flatnonzero(~found)[0]
+            raise KeyError((keys[k].item(), ids[k].item()))
+        self.keys = np.delete(self.keys, positions)
+        self.ids = np.delete(self.ids, positions)
+
+    def between(self, low=None, high=None):
+        # ids with low <= key < high
+        start = 0 if low is None else np.searchsorted(self.keys, low, 'left')
+        stop = len(self.keys) if high is None else np.searchsorted(self.keys, high, 'left')
+        return self.ids[start:max(start, stop)]
+
+    def equal(self, keys):
+        # ids filed under any of the keys
+        starts = np.searchsorted(self.keys, keys, 'left')
+        stops = np.searchsorted(self.keys, keys, 'right')
+        return np.concatenate([self.ids[start:stop] for start, stop in zip(starts.tolist(), stops.tolist())] or [self.ids[:0]])
+
+class TaskIndex:
+    # search indexes over a TaskStore: trigrams and a sorted list of the distinct task names,
+    # and rows by name, deadline and completion; kept up to date by the TaskList
+    def __init__(self, store:TaskStore):
+        self.store = store
+        self._indexed_names = 0  # the store only appends names between compactions, so new ones are those past this
+        self._lowered = []       # name id -> lowercased name
+        self._trigrams = collections.defaultdict(set)  # trigram -> set of name ids
+        self._sorted_names = []  # (lowercased name, name id) for prefix search
+        self._by_name = SortedIndex(np.int64)
+        self._by_deadline = SortedIndex(np.int64)   # only rows with a deadline
+        self._by_completion = SortedIndex(np.int64)
+
+    def _indexNames(self):
+        # catch up with the names interned since the last call
+        names = self.store.names
+        start = self._indexed_names
+        if start == len(names):
+            return
+        lowered = [name.lower() for name in names[start:]]
+        postings = self._trigrams
+        for name_id, name in enumerate(lowered, start):
+            for k in range(len(name) - TRIGRAM + 1):
+                postings[name[k:k + TRIGRAM]].add(name_id)
+        self._lowered.extend(lowered)
+        self._indexed_names = len(names)
+        added = list(zip(lowered, range(start, len(names))))
+        if len(added) > len(self._sorted_names) // 16:  # many at once, as after a load: one sort
+            self._sorted_names.extend(added)
+            self._sorted_names.sort()
+        else:
+            for entry in added:
+                bisect.insort(self._sorted_names, entry)
+
+    def _keys(self, rows):
+        store = self.store
+        deadlines = store.deadline[rows]
+        has_deadline = deadlines != NO_DEADLINE
+        return (store.name[rows].astype(np.int64), deadlines[has_deadline], rows[has_deadline],
+                store.complete[rows].astype(np.int64))
+
+    def add(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        self._indexNames()
+        names, deadlines, deadline_rows, completes = self._keys(rows)
+        self._by_name.insert(names, rows)
+        self._by_deadline.insert(deadlines, deadline_rows)
+        self._by_completion.insert(completes, rows)
+
+    def remove(self, rows):
+        # called while the rows still hold the values they were indexed under
+        rows = np.asarray(rows, dtype=np.int64)
+        names, deadlines, deadline_rows, completes = self._keys(rows)
+        self._by_name.remove(names, rows)
+        self._by_deadline.remove(deadlines, deadline_rows)
+        self._by_completion.remove(completes, rows)
+
+    def matchNames(self, text=None, prefix=None):
+        # ids of names containing text and starting with prefix, ignoring case
+        self._indexNames()
+        matches = None
+        if prefix:
+            prefix = prefix.lower()
+            matches = set()
+            k = bisect.bisect_left(self._sorted_names, (prefix,))
+            while k < len(self._sorted_names) and self._sorted_names[k][0].startswith(prefix):
+                matches.add(self._sorted_names[k][1])
+                k += 1
+        if text:
+            text = text.lower()
+            if len(text) >= TRIGRAM:
+                postings = sorted((self._trigrams.get(trigram, set()) for trigram in trigrams(text)), key=len)
+                candidates = set.intersection(*postings)
+            else:  # too short for trigrams, scan the distinct names
+                candidates = range(len(self._lowered))
+            if matches is not None:
+                candidates = matches.intersection(candidates)
+            matches = {name_id for name_id in candidates if text in self._lowered[name_id]}
+        return np.array(sorted(matches), dtype=np.int64)
+
+    def rowsWithNames(self, name_ids):
+        return self._by_name.equal(name_ids)
+
+    def rowsDueBetween(self, after=None, before=None):
+        # rows with after <= deadline < before
+        return self._by_deadline.between(None if after is None else toMicroseconds(after),
+                                         None if before is None else toMicroseconds(before))
+
+    def rowsWithCompletion(self, complete):
+        return self._by_completion.between(int(complete), int(complete) + 1)
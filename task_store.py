@@ -0,0 +1,294 @@
+import array
+import collections
+import datetime
+import numpy as np
+
+EPOCH = datetime.datetime(1970, 1, 1)
+NO_DEADLINE = np.iinfo(np.int64).min  # deadline column value of tasks without a deadline
+NAME_SLACK = 1024  # unused names tolerated in the name table on top of one per live row
+
+def toMicroseconds(moment:datetime.datetime):
+    # naive datetimes as integer microseconds, so differences match timedelta.total_seconds() exactly
+    return (moment - EPOCH) // datetime.timedelta(microseconds=1)
+
+def fromMicroseconds(microseconds):
+    return EPOCH + datetime.timedelta(microseconds=int(microseconds))
+
+# column name -> dtype; rows are task ids
+COLUMNS = {
+    'name': np.int32,           # index into the interned name table
+    'importance': np.int8,
+    'deadline': np.int64,       # microseconds since the epoch, NO_DEADLINE if none
+    'urgency': np.float64,      # NaN while not computed
+    'priority': np.float64,     # NaN while not computed
+    'complete': np.bool_,
+    'alive': np.bool_,          # False for rows that were deleted or never used
+    'order_key': np.float64,    # key the row is filed under in the TaskList priority index, NaN if not filed
+    'urgency_change': np.int64, # time the row is filed under in the TaskList urgency schedule, NO_DEADLINE if not filed
+}
+
+FILL_VALUES = {'name': 0, 'importance': 0, 'deadline': NO_DEADLINE, 'urgency': np.nan,
+               'priority': np.nan, 'complete': False, 'alive': False, 'order_key': np.nan,
+               'urgency_change': NO_DEADLINE}
+
+class TaskColumns:
+    # many tasks as whole columns, the form task files are read and written in
+    def __init__(self, task_ids, names, name_indices, importances, deadlines, urgencies, priority_scores, completes):
+        self.task_ids = task_ids                # int64, -1 where the task has no id yet
+        self.names = names                      # string table
+        self.name_indices = name_indices        # int32 positions in the string table
+        self.importances = importances          # int8
+        self.deadlines = deadlines              # int64 microseconds, NO_DEADLINE if none
+        self.urgencies = urgencies              # float64, NaN if not computed
+        self.priority_scores = priority_scores  # float64, NaN if not computed
+        self.completes = completes              # bool
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def take(self, rows):
+        # the given rows, sharing this string table
+        return TaskColumns(self.task_ids[rows], self.names, self.name_indices[rows], self.importances[rows],
+                           self.deadlines[rows], self.urgencies[rows], self.priority_scores[rows], self.completes[rows])
+
+    def toDicts(self, start=0, stop=None):
+        # the Task.toDict form of a range of tasks
+        rows = slice(start, stop)
+        names = [self.names[name_index] for name_index in self.name_indices[rows].tolist()]
+        deadlines = [None if deadline == NO_DEADLINE else fromMicroseconds(deadline).isoformat()
+                     for deadline in self.deadlines[rows].tolist()]
+        urgencies = [None if urgency != urgency else urgency for urgency in self.urgencies[rows].tolist()]  # NaN != NaN
+        scores = [None if score != score else score for score in self.priority_scores[rows].tolist()]
+        task_ids = [None if task_id < 0 else task_id for task_id in self.task_ids[rows].tolist()]
+        return [{
+            'task_id': task_id,
+            'task_name': name,
+            'importance': importance,
+            'deadline': deadline,
+            'urgency': urgency,
+            'priority_score': score,
+            'is_complete': is_complete,
+        } for task_id, name, importance, deadline, urgency, score, is_complete in zip(
+            task_ids, names, self.importances[rows].tolist(), deadlines, urgencies, scores, self.completes[rows].tolist())]
+
+def concatColumns(parts):
+    # one TaskColumns of several, over a merged string table where equal names share an index
+    name_indices, names = {}, []
+    mapped = []
+    for part in parts:
+        mapping = []
+        for name in part.names:
+            if name not in name_indices:
+                name_indices[name] = len(names)
+                names.append(name)
+            mapping.append(name_indices[name])
+        mapped.append(np.array(mapping, dtype=np.int32)[part.name_indices] if len(part) else np.empty(0, dtype=np.int32))
+    return TaskColumns(np.concatenate([part.task_ids for part in parts]).astype(np.int64), names,
+                       np.concatenate(mapped).astype(np.int32),
+                       np.concatenate([part.importances for part in parts]).astype(np.int8),
+                       np.concatenate([part.deadlines for part in parts]).astype(np.int64),
+                       np.concatenate([part.urgencies for part in parts]).astype(np.float64),
+                       np.concatenate([part.priority_scores for part in parts]).astype(np.float64),
+                       np.concatenate([part.completes for part in parts]).astype(bool))
+
+class ColumnBuilder:
+    # collects task dicts into compact typed arrays, so loading never holds a list of Python objects per task
+    def __init__(self):
+        self.names = []
+        self._name_indices = {}
+        self.task_ids = array.array('q')
+        self.name_indices = array.array('l')
+        self.importances = array.array('b')
+        self.deadlines = array.array('q')
+        self.urgencies = array.array('d')
+        self.priority_scores = array.array('d')
+        self.completes = array.array('b')
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def append(self, task_dict):
+        name = task_dict['task_name']
+        name_index = self._name_indices.get(name)
+        if name_index is None:
+            name_index = self._name_indices[name] = len(self.names)
+            self.names.append(name)
+        task_id, deadline = task_dict.get('task_id'), task_dict.get('deadline')
+        urgency, score = task_dict.get('urgency'), task_dict.get('priority_score')
+        self.task_ids.append(-1 if task_id is None else task_id)
+        self.name_indices.append(name_index)
+        self.importances.append(task_dict['importance'])
+        self.deadlines.append(toMicroseconds(datetime.datetime.fromisoformat(deadline)) if deadline else NO_DEADLINE)
+        self.urgencies.append(np.nan if urgency is None else urgency)
+        self.priority_scores.append(np.nan if score is None else score)
+        self.completes.append(bool(task_dict.get('is_complete')))
+
+    def build(self):
+        return TaskColumns(np.frombuffer(self.task_ids, dtype=np.int64), self.names,
+                           np.array(self.name_indices, dtype=np.int32), np.frombuffer(self.importances, dtype=np.int8),
+                           np.frombuffer(self.deadlines, dtype=np.int64), np.frombuffer(self.urgencies, dtype=np.float64),
+                           np.frombuffer(self.priority_scores, dtype=np.float64),
+                           np.frombuffer(self.completes, dtype=np.int8).astype(bool))
+
+class TaskStore:
+    # struct-of-arrays task storage: one numpy column per field, indexed by task id
+    def __init__(self, capacity=1024):
+        self.capacity = 0
+        self.size = 0  # rows below this may be in use
+        self.count = 0  # rows in use
+        self.free_rows = collections.deque()  # deleted rows below size, oldest first; may hold rows reused since
+        self.names = []
+        self._name_ids = {}
+        for column in COLUMNS:
+            setattr(self, column, np.empty(0, dtype=COLUMNS[column]))
+        self.reserve(capacity)
+
+    def reserve(self, capacity):
+        # grow every column geometrically so appends stay amortized O(1)
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+        for column, dtype in COLUMNS.items():
+            grown = np.full(capacity, FILL_VALUES[column], dtype=dtype)
+            grown[:self.capacity] = getattr(self, column)
+            setattr(self, column, grown)
+        self.capacity = capacity
+
+    def internName(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def internNames(self, names):
+        if not self.names:  # nothing interned yet, so the table is taken over as it is
+            self.names.extend(names)
+            self._name_ids.update(zip(names, range(len(names))))
+            if len(self._name_ids) == len(names):  # no duplicates, otherwise they are looked up below
+                return range(len(names))
+        return [self.internName(name) for name in names]
+
+    def put(self, row, task_name, importance, deadline, urgency, priority_score, is_complete):
+        self.putMany([row], [task_name], [importance], [deadline], [urgency], [priority_score], [is_complete])
+
+    def putMany(self, rows, task_names, importances, deadlines, urgencies, priority_scores, completes):
+        # write whole rows at once; deadlines are datetimes or None, scores may be None
+        self._putRows(rows, [self.internName(name) for name in task_names], importances,
+                      [NO_DEADLINE if deadline is None else toMicroseconds(deadline) for deadline in deadlines],
+                      [np.nan if urgency is None else urgency for urgency in urgencies],
+                      [np.nan if score is None else score for score in priority_scores], completes)
+
+    def putColumns(self, rows, columns:TaskColumns):
+        # write loaded columns, mapping their string table onto the interned names
+        name_ids = np.array(self.internNames(columns.names), dtype=np.int32)
+        self._putRows(rows, name_ids[columns.name_indices] if len(columns) else [], columns.importances, columns.deadlines,
+                      columns.urgencies, columns.priority_scores, columns.completes)
+
+    def _putRows(self, rows, name_ids, importances, deadlines, urgencies, priority_scores, completes):
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        self.reserve(int(rows.max()) + 1)
+        self.size = max(self.size, int(rows.max()) + 1)
+        self.name[rows] = name_ids
+        self.importance[rows] = importances
+        self.deadline[rows] = deadlines
+        self.urgency[rows] = urgencies
+        self.priority[rows] = priority_scores
+        self.complete[rows] = completes
+        self.count += len(rows) - int(np.count_nonzero(self.alive[rows]))
+        self.alive[rows] = True
+        self.order_key[rows] = np.nan
+        self.urgency_change[rows] = NO_DEADLINE
+
+    def columns(self, rows):
+        # copy rows out as TaskColumns, with a string table of only the names they use
+        rows = np.asarray(rows, dtype=np.int64)
+        name_ids, name_indices = np.unique(self.name[rows], return_inverse=True)
+        return TaskColumns(rows.copy(), [self.names[name_id] for name_id in name_ids.tolist()],
+                           name_indices.astype(np.int32), self.importance[rows], self.deadline[rows],
+                           self.urgency[rows], self.priority[rows], self.complete[rows])
+
+    def delete(self, row):
+        if self.alive[row]:
+            self.free_rows.append(row)
+        self.count -= int(self.alive[row])
+        self.alive[row] = False
+        self.order_key[row] = np.nan
+        self.urgency_change[row] = NO_DEADLINE
+
+    def clear(self):
+        for column in COLUMNS:
+            getattr(self, column)[:self.size] = FILL_VALUES[column]
+        self.size = 0
+        self.count = 0
+        self.free_rows.clear()
+        self.names.clear()
+        self._name_ids.clear()
+
+    def takeFreeRow(self, taken=()):
+        # oldest deleted row that is still unused and not in taken, None if there is none
+        while self.free_rows:
+            row = self.free_rows.popleft()
+            if not self.alive[row] and row not in taken:
+                return row
+        return None
+
+    def compactNames(self):
+        # drop names no live row uses once more than NAME_SLACK of them piled up; True if name ids changed
+        if len(self.names) <= self.count + NAME_SLACK:
+            return False
+        rows = self.liveRows()
+        name_ids, name_indices = np.unique(self.name[rows], return_inverse=True)
+        self.names = [self.names[name_id] for name_id in name_ids.tolist()]
+        self._name_ids = {}
+        for name_id, name in enumerate(self.names):
+            self._name_ids.setdefault(name, name_id)
+        self.name[:self.size] = FILL_VALUES['name']
+        self.name[rows] = name_indices
+        return True
+
+    def isAlive(self, row):
+        return 0 <= row < self.size and bool(self.alive[row])
+
+    def liveRows(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def nbytes(self):
+        # memory held by the columns; the name table is shared between equal names
+        return sum(getattr(self, column).nbytes for column in COLUMNS)
+
+    def toDicts(self, rows):
+        # the Task.toDict form of many rows
+        return self.columns(rows).toDicts()
+
+    # field access for Task views
+    def getField(self, row, field):
+        if field == 'task_name':
+            return self.names[self.name[row]]
+        if field == 'importance':
+            return int(self.importance[row])
+        if field == 'deadline':
+            deadline = self.deadline[row]
+            return None if deadline == NO_DEADLINE else fromMicroseconds(deadline)
+        if field in ('urgency', 'priority_score'):
+            value = (self.urgency if field == 'urgency' else self.priority)[row]
+            return None if np.isnan(value) else float(value)
+        if field == 'is_complete':
+            return bool(self.complete[row])
+        raise AttributeError(field)
+
+    def setField(self, row, field, value):
+        if field == 'task_name':
+            self.name[row] = self.internName(value)
+        elif field == 'importance':
+            self.importance[row] = value
+        elif field == 'deadline':
+            self.deadline[row] = NO_DEADLINE if value is None else toMicroseconds(value)
+        elif field in ('urgency', 'priority_score'):
+            (self.urgency if field == 'urgency' else self.priority)[row] = np.nan if value is None else value
+        elif field == 'is_complete':
+            self.complete[row] = bool(value)
+        else:
+            raise AttributeError(field)
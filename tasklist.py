@@ -1,79 +1,553 @@
 from priority_scorer import FuzzyPriorityScorer
 from task import Task
+from task_store import TaskStore, TaskColumns, ColumnBuilder, concatColumns, NO_DEADLINE, toMicroseconds, fromMicroseconds
+from task_files import PROGRESS_INTERVAL
+from task_index import TaskIndex, SortedIndex
+import task_files
+import metrics
 import datetime
 import json
-import math
+import numpy as np
+
+ID_GAP = 1 << 20  # persisted ids further than this past the highest id are renumbered, since ids are store rows
+
+# which of several copies of a task a merge keeps: the first or last in file order, or a complete or incomplete one
+MERGE_RULES = ('first', 'last', 'complete', 'incomplete')
+
+def writeJsonAtomic(filename, data, indent=4):
+    task_files.writeAtomic(filename, lambda file: json.dump(data, file, indent=indent))
+
+def roundTenths(values):
+    # np.round scales by 10 before rounding, which can disagree with round(x, 1) on exact ties,
+    # so values sitting on a tie are rounded again the way round() does it
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ties:
+        rounded[i] = round(float(values[i]), 1)
+    return rounded
+
+def urgencyFromDeadlines(deadlines, now, closest_time_diff):
+    # urgencies of deadlines (microseconds) relative to the closest one, which is closest_time_diff seconds after now
+    time_diffs = (deadlines - now) / 10**6
+    time_diffs = np.minimum(time_diffs, closest_time_diff * 2)   # to adjust in case time_diff is too large
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = (closest_time_diff / time_diffs) * 10
+    return np.where(time_diffs > 0, roundTenths(ratios), 0)
+
+def urgencyChangeTimes(deadlines, urgencies, closest_deadline):
+    # when urgencies (rounded to tenths) of deadlines next change as time passes, NO_DEADLINE if never.
+    # Until the closest deadline an urgency is 10 * (closest - now) / (deadline - now), which falls to the
+    # cap of 5, so it changes once it drops below its rounded value less 0.05; at the cap it only changes
+    # when the closest deadline passes and every urgency becomes 0
+    bounds = urgencies - 0.05
+    with np.errstate(divide='ignore', invalid='ignore'):
+        times = np.where(bounds > 5, closest_deadline - bounds * (deadlines - closest_deadline) / (10 - bounds), closest_deadline)
+    return np.where(urgencies > 0, np.ceil(times), NO_DEADLINE).astype(np.int64)
+
+def dropDuplicates(columns:TaskColumns, rule='first', existing:TaskColumns=None):
+    # the tasks of columns with one copy of each name, deadline and importance, chosen by rule, in their order;
+    # tasks that are also in existing are dropped, and existing itself is left as it is
+    if rule not in MERGE_RULES:
+        raise ValueError(f"Unknown merge rule: {rule}")
+    skip = 0
+    if existing is not None:
+        skip = len(existing)
+        columns = concatColumns([existing, columns])
+    keys = np.empty(len(columns), dtype=[('name', np.int32), ('deadline', np.int64), ('importance', np.int8)])
+    keys['name'] = columns.name_indices
+    keys['deadline'] = columns.deadlines
+    keys['importance'] = columns.importances
+    _, codes = np.unique(keys, return_inverse=True)
+    codes = codes.ravel()
+    candidates = skip + np.flatnonzero(~np.isin(codes[skip:], codes[:skip]))
+    completes = columns.completes[candidates]
+    preferred = candidates[{'first': slice(None), 'last': slice(None, None, -1),
+                            'complete': np.argsort(~completes, kind='stable'),
+                            'incomplete': np.argsort(completes, kind='stable')}[rule]]
+    _, first = np.unique(codes[preferred], return_index=True)  # np.unique returns the first occurrence of each key
+    return columns.take(np.sort(preferred[first]))
 
 class TaskList:
-    def __init__(self):
-        self.priority_scorer = FuzzyPriorityScorer()
-        self.tasks = []
-        
+    def __init__(self, priority_scorer:FuzzyPriorityScorer=None):
+        self.priority_scorer = priority_scorer or FuzzyPriorityScorer()
+        self._store = TaskStore()  # one row per task, the row is the task id
+        self._priority_index = SortedIndex(np.float64)  # (-priority_score, task_id), highest priority first
+        self._index = None      # TaskIndex for search, built on first use
+        self._urgency_schedule = SortedIndex(np.int64)  # (time the urgency next changes, task_id), soonest first
+        self._dirty = set()     # ids of tasks that need to be rescored
+        self._next_id = 0
+        self.storage = None     # optional TaskStorage backend that every change is reported to
+        self.defer_rescoring = False  # when set, changes only mark tasks dirty until rescoreDirty()
+
+        # reference point of the last urgency pass, reused when rescoring single tasks
+        self._urgency_now = None
+        self._closest_id = None
+        self._closest_deadline = None  # in microseconds
+        self._closest_time_diff = None
+
+    def _ordered(self):
+        # ids in priority order; tasks still waiting for a deferred rescore are rescored first, so none is left out
+        self.rescoreDirty()
+        return self._priority_index.ids
+
+    @property
+    def tasks(self):
+        # tasks in priority order
+        return self._views(self._ordered())
+
+    def tasksInRange(self, start, stop):
+        # a slice of the priority order, without materializing the whole list
+        return self._views(self._ordered()[start:stop])
+
+    @property
+    def index(self):
+        # search indexes are only built once something searches, then kept up to date on every change
+        if self._index is None:
+            index = TaskIndex(self._store)
+            index.add(self._store.liveRows())
+            self._index = index
+        return self._index
+
+    def search(self, text=None, prefix=None, due_after=None, due_before=None, complete=None, limit=50):
+        # up to limit tasks in priority order whose name contains text and starts with prefix, ignoring case,
+        # that are due in [due_after, due_before) and whose completion is complete; None skips a condition
+        self.rescoreDirty()  # so every match has its place in the priority order
+        matches = self._matches(text, prefix, due_after, due_before, complete)
+        if matches is None:
+            return self._views(self._firstInOrder(complete, limit))
+        return self._views(self._inOrder(matches)[:limit])
+
+    def searchIds(self, text=None, prefix=None, due_after=None, due_before=None, complete=None):
+        # ids of every task search() matches, in priority order, without materializing them
+        self.rescoreDirty()
+        matches = self._matches(text, prefix, due_after, due_before, complete)
+        if matches is None:
+            ordered = self._ordered()
+            return ordered if complete is None else ordered[self._store.complete[ordered] == complete]
+        return self._inOrder(matches)
+
+    def _matches(self, text, prefix, due_after, due_before, complete):
+        # ids meeting the search conditions in no particular order, None if there are none besides complete=False
+        store = self._store
+        index = self.index
+        matches = None
+        if text or prefix:
+            matches = index.rowsWithNames(index.matchNames(text, prefix))
+        if due_after is not None or due_before is not None:
+            due = index.rowsDueBetween(due_after, due_before)
+            matches = due if matches is None else np.intersect1d(matches, due)
+        if matches is None and complete:  # completed tasks are at the bottom of the priority order
+            matches = index.rowsWithCompletion(True)
+        if matches is not None and complete is not None:
+            matches = matches[store.complete[matches] == complete]
+        return matches
+
+    def _inOrder(self, task_ids):
+        return task_ids[np.lexsort((task_ids, self._store.order_key[task_ids]))]
+
+    def _firstInOrder(self, complete, limit):
+        # walk the priority order from the top until limit tasks of that completion are found
+        ordered = self._ordered()
+        if complete is None:
+            return ordered[:limit]
+        found, count, step = [ordered[:0]], 0, max(limit, 1) * 4
+        for start in range(0, len(ordered), step):
+            chunk = ordered[start:start + step]
+            found.append(chunk[self._store.complete[chunk] == complete])
+            count += len(found[-1])
+            if count >= limit:
+                break
+        return np.concatenate(found)[:limit]
+
+    def _views(self, task_ids):
+        return [Task.view(self._store, task_id) for task_id in task_ids.tolist()]
+
+    def __len__(self):
+        return self._store.count
+
+    def getTask(self, task_id):
+        if not self._store.isAlive(task_id):
+            raise KeyError(task_id)
+        return Task.view(self._store, task_id)
+
+    def _assignIds(self, task_ids):
+        # keep persisted ids that are still free, otherwise hand out new ones; None or -1 means no id
+        limit = self._next_id + len(task_ids) + ID_GAP
+        if len(task_ids) and None not in task_ids:
+            ids = np.asarray(task_ids, dtype=np.int64)
+            if ids.min() >= 0 and ids.max() < limit and not (np.diff(np.sort(ids)) == 0).any() \
+                    and not self._store.alive[ids[ids < self._store.size]].any():
+                self._next_id = max(self._next_id, int(ids.max()) + 1)
+                return ids
+        assigned, taken = [], set()
+        for task_id in (task_ids.tolist() if isinstance(task_ids, np.ndarray) else task_ids):
+            if task_id is None or not 0 <= task_id < limit or task_id in taken or self._store.isAlive(task_id):
+                task_id = self._store.takeFreeRow(taken)  # reuse deleted rows so the store stays as small as it was
+                if task_id is None:
+                    task_id = self._next_id
+            taken.add(task_id)
+            self._next_id = max(self._next_id, task_id + 1)
+            assigned.append(task_id)
+        return np.array(assigned, dtype=np.int64)
+
+    def _put(self, task_ids, task_names, importances, deadlines, urgencies, priority_scores, completes):
+        next_id = self._next_id
+        task_ids = self._assignIds(task_ids).tolist()
+        try:
+            self._store.putMany(task_ids, task_names, importances, deadlines, urgencies, priority_scores, completes)
+        except Exception:
+            # no task got the ids, so hand them out again
+            self._next_id = next_id
+            self._store.free_rows.extendleft(task_id for task_id in reversed(task_ids) if task_id < next_id)
+            raise
+        return task_ids
+
+    def _putTasks(self, tasks):
+        # copy the tasks into store rows and turn them into views of those rows
+        task_ids = self._put([task.task_id for task in tasks], [task.task_name for task in tasks],
+                             [task.importance for task in tasks], [task.deadline for task in tasks],
+                             [task.urgency for task in tasks], [task.priority_score for task in tasks],
+                             [task.is_complete for task in tasks])
+        for task, task_id in zip(tasks, task_ids):
+            task.attach(self._store, task_id)
+        if self._index is not None:
+            self._index.add(task_ids)
+        return task_ids
+
     def addTask(self, task:Task):
-        self.tasks.append(task)
-        self.calculateUrgency()
-        self.calculatePriority() 
-        self.sortTasks()
-        
-    def deleteTask(self, index):
-        self.tasks.pop(index)
-        
+        task_id, = self._putTasks([task])
+        self.markDirty(task_id)
+        self._rescoreChanges()
+        self._storePut(task)
+        return task_id
+
+    def addTasks(self, tasks):
+        # bulk insert: one urgency pass, one scoring pass and one sort for the whole batch
+        tasks = list(tasks)
+        self._putTasks(tasks)
+        self.refreshList()
+        if self.storage:
+            self.storage.recordPuts(tasks)
+
+    def deleteTask(self, task_id):
+        task = self.getTask(task_id)
+        task.detach()
+        self._unindex(np.array([task_id], dtype=np.int64))
+        self._unschedule(np.array([task_id], dtype=np.int64))
+        if self._index is not None:
+            self._index.remove([task_id])
+        self._store.delete(task_id)
+        self._dirty.discard(task_id)
+        self._compactNames()
+        self._rescoreChanges()
+        if self.storage:
+            self.storage.recordDelete(task_id)
+        return task
+
+    def clear(self):
+        self._store.clear()
+        self._next_id = 0  # ids are store rows, which start over
+        self._priority_index = SortedIndex(np.float64)
+        self._index = None
+        self._urgency_schedule = SortedIndex(np.int64)
+        self._dirty.clear()
+        self._closest_id = None
+
+    def updateTask(self, task_id, **changes):
+        # edit task fields in place and reposition only that task
+        task = self.getTask(task_id)
+        for field in changes:
+            if field not in ('task_name', 'importance', 'deadline', 'is_complete'):
+                raise ValueError(f"Unknown task field: {field}")
+
+        def apply():
+            for field, value in changes.items():
+                setattr(task, field, value)
+        self._changeIndexed(task_id, apply)
+        if 'task_name' in changes:
+            self._compactNames()
+        self.markDirty(task_id)
+        self._rescoreChanges()
+        self._storePut(task)
+
+    def _compactNames(self):
+        # the search index caches name ids, so it is rebuilt on next use when they are renumbered
+        if self._store.compactNames():
+            self._index = None
+
+    def _changeIndexed(self, task_id, change):
+        # the search index files a task under its values, so it is taken out while they change
+        if self._index is None:
+            change()
+            return
+        self._index.remove([task_id])
+        try:
+            change()
+        finally:
+            self._index.add([task_id])
+
+    def _storePut(self, task:Task):
+        if self.storage:
+            self.storage.recordPut(task)
+
+    def markDirty(self, task_id):
+        self._dirty.add(task_id)
+
+    def _rescoreChanges(self):
+        if not self.defer_rescoring:
+            self.rescoreDirty()
+
+    def rescoreDirty(self):
+        if not self._dirty and not self._closestDeadlineChanged():
+            return
+        if self._closestDeadlineChanged():  # urgencies of all deadlined tasks move with the anchor
+            self.refreshList()
+            return
+
+        dirty = np.fromiter(self._dirty, dtype=np.int64, count=len(self._dirty))
+        self._dirty.clear()
+        self._store.urgency[dirty] = self._urgencies(dirty)
+        self._score(dirty)
+        self._reindex(dirty)
+        self._schedule(dirty)
+        if self.storage:
+            self.storage.recordScores(self._views(dirty))
+
+    def nextUrgencyChange(self):
+        # when the urgency of some task next changes with the passing time, None if none will
+        if not len(self._urgency_schedule):
+            return None
+        return fromMicroseconds(self._urgency_schedule.keys[0])
+
+    @metrics.timed('rescoreDue')
+    def rescoreDue(self, now=None):
+        # move the reference time of the last urgency pass to now and rescore only the tasks whose urgency
+        # changed since; the others would get the same urgency back. Returns their ids.
+        now = toMicroseconds(now or datetime.datetime.now())
+        due = self._urgency_schedule.between(None, now + 1)
+        if not len(due):
+            return due
+        self._urgency_now = now
+        self._closest_time_diff = (self._closest_deadline - now) / 10**6
+        self._store.urgency[due] = self._urgencies(due)
+        self._score(due)
+        self._reindex(due)
+        self._schedule(due, now)
+        if self.storage:
+            self.storage.recordScores(self._views(due))
+        return due
+
+    def _closestDeadlineChanged(self):
+        # every other urgency is relative to the closest deadline
+        store = self._store
+        if self._closest_id is not None and not store.isAlive(self._closest_id):
+            return True
+        if self._closest_id in self._dirty:
+            return True
+        for task_id in self._dirty:
+            deadline = store.deadline[task_id]
+            if deadline != NO_DEADLINE and not store.complete[task_id] and \
+                    (self._closest_id is None or deadline < self._closest_deadline):
+                return True
+        return False
+
+    def _schedule(self, task_ids, now=None):
+        # file the tasks under the time their urgency next changes, if it will; never at or before now,
+        # so a time rounded onto the boundary cannot be due again straight away
+        self._unschedule(task_ids)
+        if self._closest_id is None:
+            return
+        store = self._store
+        task_ids = self._pendingDeadlines(task_ids)
+        times = urgencyChangeTimes(store.deadline[task_ids], store.urgency[task_ids], self._closest_deadline)
+        task_ids, times = task_ids[times != NO_DEADLINE], times[times != NO_DEADLINE]
+        if now is not None:
+            times = np.maximum(times, now + 1)
+        self._urgency_schedule.insert(times, task_ids)
+        store.urgency_change[task_ids] = times
+
+    def _unschedule(self, task_ids):
+        store = self._store
+        task_ids = task_ids[store.urgency_change[task_ids] != NO_DEADLINE]
+        self._urgency_schedule.remove(store.urgency_change[task_ids], task_ids)
+        store.urgency_change[task_ids] = NO_DEADLINE
+
+    def _pendingDeadlines(self, task_ids):
+        # the ids among task_ids that are incomplete and have a deadline
+        store = self._store
+        return task_ids[~store.complete[task_ids] & (store.deadline[task_ids] != NO_DEADLINE)]
+
+    @metrics.timed('calculateUrgency')
     def calculateUrgency(self):
-        deadlined_tasks = [t for t in self.tasks if t.deadline and not t.is_complete]
-        
-        if not deadlined_tasks: # return from function if there are no tasks with deadlines (no urgency)
+        store = self._store
+        store.urgency[:store.size] = 0
+        store.urgency_change[:store.size] = NO_DEADLINE
+        self._urgency_schedule = SortedIndex(np.int64)
+
+        task_ids = self._pendingDeadlines(store.liveRows())
+        if not len(task_ids): # no tasks with deadlines means no urgency
+            self._closest_id = None
             return
-    
-        # find task with the closest deadline
-        closest_deadline = min(deadlined_tasks, key=lambda t: t.deadline)
-        closest_time_diff = (closest_deadline.deadline - datetime.datetime.now()).total_seconds()
-        
-        for task in self.tasks:
-            if task in deadlined_tasks:
-                time_diff = (task.deadline - datetime.datetime.now()).total_seconds()
-                time_diff = min(time_diff, closest_time_diff * 2)   # to adjust in case time_diff is too large
-                task.urgency = round((closest_time_diff / time_diff) * 10, 1) if time_diff > 0 else 0
-            else:
-                task.urgency = 0
+
+        # find task with the closest deadline, measured from a single reference time
+        deadlines = store.deadline[task_ids]
+        closest = int(np.argmin(deadlines))
+        self._urgency_now = toMicroseconds(datetime.datetime.now())
+        self._closest_id = int(task_ids[closest])
+        self._closest_deadline = int(deadlines[closest])
+        self._closest_time_diff = (self._closest_deadline - self._urgency_now) / 10**6
+        store.urgency[task_ids] = urgencyFromDeadlines(deadlines, self._urgency_now, self._closest_time_diff)
+
+        # and when each of those urgencies will next change, for rescoreDue
+        times = urgencyChangeTimes(deadlines, store.urgency[task_ids], self._closest_deadline)
+        scheduled = times != NO_DEADLINE
+        self._urgency_schedule.assign(times[scheduled], task_ids[scheduled])
+        store.urgency_change[task_ids[scheduled]] = times[scheduled]
+
+    def _urgencies(self, task_ids):
+        # urgencies of a few tasks against the anchor of the last urgency pass
+        urgencies = np.zeros(len(task_ids))
+        if self._closest_id is None:
+            return urgencies
+        store = self._store
+        pending = ~store.complete[task_ids] & (store.deadline[task_ids] != NO_DEADLINE)
+        urgencies[pending] = urgencyFromDeadlines(
+            store.deadline[task_ids[pending]], self._urgency_now, self._closest_time_diff)
+        return urgencies
 
     def refreshList(self):
+        self._dirty.clear()
         self.calculateUrgency()
-        self.calculatePriority() 
-        self.sortTasks()
-                
-    def triggerCompletion(self, index):
-        self.tasks[index].triggerCompletion()
         self.calculatePriority()
         self.sortTasks()
-                
+        if self.storage:
+            self.storage.recordScores(self._views(self._store.liveRows()))
+
+    def triggerCompletion(self, task_id):
+        task = self.getTask(task_id)
+        self._changeIndexed(task_id, task.triggerCompletion)
+        self.markDirty(task_id)
+        self._rescoreChanges()
+        self._storePut(task)
+
+    @metrics.timed('calculatePriority')
     def calculatePriority(self):
-        for task in self.tasks:
-            if task.is_complete == False:
-                task.priority_score = self.priority_scorer.getPriorityScore(task.importance, task.urgency)
-            else:
-                task.priority_score = 0
-            
+        self._score(self._store.liveRows())
+
+    def _score(self, task_ids):
+        # score every incomplete task in one batch instead of one simulation per task
+        store = self._store
+        complete = store.complete[task_ids]
+        pending = task_ids[~complete]
+        store.priority[pending] = self.priority_scorer.getPriorityScores(store.importance[pending], store.urgency[pending])
+        store.priority[task_ids[complete]] = 0
+
+    @metrics.timed('sortTasks')
     def sortTasks(self):
-        self.tasks = sorted(self.tasks, key=lambda task: task.priority_score, reverse=True)
-            
+        store = self._store
+        task_ids = store.liveRows()
+        keys = -store.priority[task_ids]
+        self._priority_index.assign(keys, task_ids)
+        store.order_key[:store.size] = np.nan
+        store.order_key[task_ids] = keys
+
+    def _unindex(self, task_ids):
+        store = self._store
+        task_ids = task_ids[~np.isnan(store.order_key[task_ids])]
+        if not len(task_ids):
+            return
+        self._priority_index.remove(store.order_key[task_ids], task_ids)
+        store.order_key[task_ids] = np.nan
+
+    def _reindex(self, task_ids):
+        # binary search out the old positions and in the new ones, one array copy for the whole batch
+        self._unindex(task_ids)
+        keys = -self._store.priority[task_ids]
+        self._priority_index.insert(keys, task_ids)
+        self._store.order_key[task_ids] = keys
+
+    def toJsonData(self):
+        return {
+            'scorer_version': self.priority_scorer.version,
+            'tasks': self._store.toDicts(self._ordered())
+        }
+
+    def toColumns(self):
+        # tasks in priority order, as whole columns
+        return self._store.columns(self._ordered())
+
+    @metrics.timed('saveToJson')
     def saveToJson(self, filename='tasks.json'):
-        with open(filename, 'w') as file:
-            json.dump([task.toDict() for task in self.tasks], file, indent=4)
-            
-    def loadFromJson(self, filename='tasks.json'):
+        task_files.writeAtomic(filename, lambda file: task_files.writeJson(file, self.toColumns(), self.priority_scorer.version))
+
+    @metrics.timed('saveToFile')
+    def saveToFile(self, filename):
+        # JSON, JSON lines or binary, by the file extension
+        task_files.writeColumns(filename, self.toColumns(), self.priority_scorer.version)
+
+    @metrics.timed('loadFromJson')
+    def loadFromJson(self, filename='tasks.json', trust_persisted_scores=False, replace=False, progress=None):
+        # trust_persisted_scores skips rescoring when the file was written by the same scorer definition
         try:
-            with open(filename, 'r') as file:
-                tasks_data = json.load(file)
-                for task_data in tasks_data:
-                    deadline = datetime.datetime.fromisoformat(task_data['deadline']) if task_data['deadline'] else None
-                    task = Task(
-                        task_name=task_data['task_name'],
-                        importance=task_data['importance'],
-                        deadline=deadline
-                    )
-                    task.urgency = task_data['urgency']
-                    task.priority_score = task_data['priority_score']
-                    task.is_complete = task_data['is_complete']
-                    self.addTask(task)
+            columns, scorer_version = task_files.readStream(filename, task_files.iterJsonTasks, progress)
         except FileNotFoundError:
-            pass
+            return
+        self.loadColumns(columns, scorer_version, trust_persisted_scores, replace)
+
+    @metrics.timed('loadFromFile')
+    def loadFromFile(self, filename, trust_persisted_scores=False, replace=False, progress=None):
+        # JSON, JSON lines or binary, by the file extension
+        try:
+            columns, scorer_version = task_files.readColumns(filename, progress)
+        except FileNotFoundError:
+            return
+        self.loadColumns(columns, scorer_version, trust_persisted_scores, replace)
+
+    @metrics.timed('mergeFromFiles')
+    def mergeFromFiles(self, filenames, rule='first', replace=False, workers=None, progress=None):
+        # add the tasks of several files, read in parallel, with one copy of each task (same name, deadline and
+        # importance) across the files, chosen by rule; then one scoring pass over the result. Tasks already in
+        # the list are kept as they are, and file tasks matching one of them are skipped
+        if not filenames:
+            return
+        imported = concatColumns([columns for columns, _ in task_files.readMany(filenames, workers, progress)])
+        existing = None if replace else self._store.columns(self._store.liveRows())
+        self.loadColumns(dropDuplicates(imported, rule, existing), replace=replace)
+
+    def loadFromData(self, data, trust_persisted_scores=False, replace=False, progress=None):
+        # progress(done, total) is called while tasks are built and may raise to abort the load
+        # older files are a bare list of tasks without a scorer version
+        tasks_data = data['tasks'] if isinstance(data, dict) else data
+        scorer_version = data.get('scorer_version') if isinstance(data, dict) else None
+
+        builder = ColumnBuilder()
+        for task_data in tasks_data:
+            builder.append(task_data)
+            if progress and len(builder) % PROGRESS_INTERVAL == 0:
+                progress(len(builder), len(tasks_data))
+        self.loadColumns(builder.build(), scorer_version, trust_persisted_scores, replace)
+        if progress:
+            progress(len(builder), len(tasks_data))
+
+    def loadColumns(self, columns:TaskColumns, scorer_version=None, trust_persisted_scores=False, replace=False):
+        # replace clears the list only now that every task was read, so an aborted load leaves it intact
+        if replace:
+            self.clear()
+        task_ids = self._assignIds(columns.task_ids)
+        self._store.putColumns(task_ids, columns)
+        if self._index is not None:
+            self._index.add(task_ids)
+        if trust_persisted_scores and scorer_version == self.priority_scorer.version \
+                and not np.isnan(columns.priority_scores).any():
+            # urgencies move with the time since the save and set up the urgency schedule, so they are
+            # recomputed; only the tasks whose urgency changed are scored again
+            live = self._store.liveRows()
+            persisted = self._store.urgency[live]
+            self.calculateUrgency()
+            self._score(live[self._store.urgency[live] != persisted])
+            self.sortTasks()
+        else:
+            self.refreshList()
+        if self.storage:
+            self.storage.recordPuts(self._views(task_ids))
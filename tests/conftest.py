@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# the modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from priority_scorer import FuzzyPriorityScorer
+
+@pytest.fixture(scope='session')
+def scorer():
+    return FuzzyPriorityScorer()
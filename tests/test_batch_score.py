@@ -0,0 +1,77 @@
+import csv
+import datetime
+import json
+import types
+
+import pytest
+
+import batch_score
+import tasklist
+from task import Task, FIELDS
+from tasklist import TaskList
+
+NOW = datetime.datetime(2030, 1, 1, 9)
+
+@pytest.fixture
+def frozen(monkeypatch):
+    # TaskList scores against datetime.datetime.now(), batch_score against --now
+    class FrozenDateTime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return NOW
+    monkeypatch.setattr(tasklist, 'datetime', types.SimpleNamespace(datetime=FrozenDateTime, timedelta=datetime.timedelta))
+
+@pytest.fixture
+def tasks_file(tmp_path, scorer, frozen):
+    tasks = [Task(f"task {k}", k % 11, NOW + datetime.timedelta(hours=3 + 5 * k) if k % 3 else None) for k in range(150)]
+    for task in tasks[::7]:
+        task.is_complete = True
+    task_list = TaskList(scorer)
+    task_list.addTasks(tasks)
+    filename = str(tmp_path / 'tasks.json')
+    task_list.saveToJson(filename)
+    return filename
+
+def reference(filename, scorer, tmp_path):
+    # the same tasks ranked by a TaskList at the same time
+    task_list = TaskList(scorer)
+    task_list.loadFromJson(filename)
+    expected = str(tmp_path / 'expected.json')
+    task_list.saveToJson(expected)
+    with open(expected) as file:
+        return file.read()
+
+def runBatch(*args):
+    assert batch_score.main([*args, '--now', NOW.isoformat(), '--workers', '2', '--chunk-size', '16']) == 0
+
+def test_output_matches_tasklist(tasks_file, scorer, tmp_path):
+    output = str(tmp_path / 'ranked.json')
+    runBatch(tasks_file, '-o', output)
+    with open(output) as file:
+        assert file.read() == reference(tasks_file, scorer, tmp_path)
+
+def test_top_k(tasks_file, scorer, tmp_path):
+    output = str(tmp_path / 'top.jsonl')
+    runBatch(tasks_file, '-o', output, '--top', '10')
+    with open(output) as file:
+        ranked = [json.loads(line) for line in file]
+    assert ranked == json.loads(reference(tasks_file, scorer, tmp_path))['tasks'][:10]
+
+def test_csv_in_and_out(tasks_file, scorer, tmp_path):
+    with open(tasks_file) as file:
+        tasks = json.load(file)['tasks']
+    csv_file = str(tmp_path / 'tasks.csv')
+    with open(csv_file, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=['task_id', 'task_name', 'importance', 'deadline', 'is_complete'])
+        writer.writeheader()
+        for task in tasks:
+            writer.writerow({field: task[field] for field in writer.fieldnames})
+
+    output = str(tmp_path / 'ranked.csv')
+    runBatch(csv_file, '-o', output)
+    with open(output, newline='') as file:
+        rows = list(csv.DictReader(file))
+    expected = json.loads(reference(tasks_file, scorer, tmp_path))['tasks']
+    assert list(rows[0]) == list(FIELDS)
+    assert [(int(row['task_id']), float(row['priority_score'])) for row in rows] == \
+        [(task['task_id'], task['priority_score']) for task in expected]
@@ -0,0 +1,84 @@
+import json
+import os
+
+from journal import TaskJournal, saveSnapshot
+from task import Task
+from tasklist import TaskList
+
+def names(task_list):
+    return sorted(task.task_name for task in task_list.tasks)
+
+def journaledList(filename, scorer, task_names):
+    task_list = TaskList(scorer)
+    journal = TaskJournal(filename)
+    journal.load(task_list)
+    for name in task_names:
+        task_list.addTask(Task(name, 5, None))
+    return task_list, journal
+
+def test_changes_are_replayed_over_the_snapshot(tmp_path, scorer):
+    filename = str(tmp_path / 'tasks.json')
+    task_list, journal = journaledList(filename, scorer, ['a', 'b', 'c'])
+    task_list.updateTask(task_list.tasks[0].task_id, task_name='renamed')
+    task_list.deleteTask(next(task.task_id for task in task_list.tasks if task.task_name == 'b'))
+    expected = names(task_list)
+    journal.detach()
+
+    replayed = TaskList(scorer)
+    TaskJournal(filename).load(replayed)
+    assert names(replayed) == expected
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path, scorer):
+    filename = str(tmp_path / 'tasks.json')
+    task_list, journal = journaledList(filename, scorer, ['a', 'b'])
+    journal.compact()
+    task_list.addTask(Task('after', 5, None))  # goes to the fresh journal while the snapshot is written
+    journal.detach()
+    assert not os.path.exists(filename + '.journal.compacting')
+
+    replayed = TaskList(scorer)
+    TaskJournal(filename).load(replayed)
+    assert names(replayed) == ['a', 'after', 'b']
+
+def test_torn_last_line_is_ignored(tmp_path, scorer):
+    filename = str(tmp_path / 'tasks.json')
+    _, journal = journaledList(filename, scorer, ['a'])
+    journal.detach()
+    with open(filename + '.journal', 'a') as file:
+        file.write('{"op": "put", "ta')
+
+    replayed = TaskList(scorer)
+    TaskJournal(filename).load(replayed)
+    assert names(replayed) == ['a']
+
+def test_stale_journal_is_not_replayed_after_a_full_save(tmp_path, scorer):
+    filename = str(tmp_path / 'tasks.json')
+    _, journal = journaledList(filename, scorer, ['old1', 'old2'])
+    journal.detach()
+
+    # a later session without the journal deletes a task and saves the whole list
+    task_list = TaskList(scorer)
+    task_list.loadFromFile(filename)
+    task_list.addTask(Task('old1', 5, None))
+    task_list.addTask(Task('new', 5, None))
+    saveSnapshot(task_list, filename)
+    assert not os.path.exists(filename + '.journal')
+
+    replayed = TaskList(scorer)
+    TaskJournal(filename).load(replayed)
+    assert names(replayed) == ['new', 'old1']
+
+def test_snapshot_without_ids_gets_them_before_journaling(tmp_path, scorer):
+    filename = tmp_path / 'legacy.json'
+    filename.write_text(json.dumps([{'task_name': name, 'importance': 5, 'deadline': None, 'is_complete': False}
+                                    for name in ['a', 'b', 'c']]))
+    task_list = TaskList(scorer)
+    task_list.addTasks([Task('other', 5, None)])  # ids handed out before do not line up with file positions
+    journal = TaskJournal(str(filename))
+    journal.load(task_list)
+    task_list.updateTask(next(task.task_id for task in task_list.tasks if task.task_name == 'a'), task_name='a-renamed')
+    journal.detach()
+
+    replayed = TaskList(scorer)
+    TaskJournal(str(filename)).load(replayed)
+    assert names(replayed) == ['a-renamed', 'b', 'c']
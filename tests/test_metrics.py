@@ -0,0 +1,35 @@
+import pstats
+
+import metrics
+from task import Task
+from tasklist import TaskList
+from worker import TaskWorker
+
+def onUiThread():
+    return sum(range(1000))
+
+def test_timed_operations_are_recorded():
+    metrics.reset()
+    metrics.enable()
+    try:
+        timedSum = metrics.timed('sum')(onUiThread)
+        timedSum()
+        timedSum()
+    finally:
+        metrics.disable()
+    assert metrics.stats()['sum']['count'] == 2
+
+def test_profile_includes_worker_jobs(tmp_path, scorer):
+    task_list = TaskList(scorer)
+    worker = TaskWorker(task_list)
+    filename = str(tmp_path / 'profile.out')
+    metrics.startProfile()
+    try:
+        onUiThread()
+        worker.submit(lambda job: task_list.addTasks([Task(f"task {k}", 5, None) for k in range(10)]))
+        worker.stop()
+    finally:
+        text = metrics.stopProfile(filename, limit=None)
+    assert 'addTasks' in text and 'onUiThread' in text
+    functions = {function for _, _, function in pstats.Stats(filename).stats}
+    assert {'addTasks', 'onUiThread'} <= functions
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from priority_scorer import FuzzyPriorityScorer, mamdaniScores, IMPORTANCE_GRID, URGENCY_GRID, \
+    NUMPY_BACKEND_TOLERANCE
+
+def test_lookup_table_is_cached_and_reused(tmp_path):
+    cache_file = str(tmp_path / 'cache' / 'table.npz')
+    built = FuzzyPriorityScorer(use_lookup_table=True, cache_file=cache_file)
+    assert os.path.exists(cache_file)
+    cached = FuzzyPriorityScorer(use_lookup_table=True, cache_file=cache_file)
+    assert np.array_equal(built.lookup_table, cached.lookup_table)
+
+def test_unwritable_cache_falls_back_to_the_table_in_memory(tmp_path):
+    blocker = tmp_path / 'not_a_directory'
+    blocker.write_text('')
+    scorer = FuzzyPriorityScorer(use_lookup_table=True, cache_file=str(blocker / 'table.npz'))
+    assert scorer.lookup_table is not None
+    assert 0 <= scorer.lookupPriorityScore(5, 5) <= 10
+
+def test_batch_scores_match_single_scores(scorer):
+    importances = np.array([0, 3, 7, 10, 5.5])
+    urgencies = np.array([0, 10, 2.5, 5, 7.3])
+    single = [scorer.getPriorityScore(i, u) for i, u in zip(importances, urgencies)]
+    assert np.allclose(scorer.getPriorityScores(importances, urgencies), single)
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')  # raised inside skfuzzy
+def test_numpy_engine_matches_skfuzzy():
+    importances, urgencies = np.meshgrid(IMPORTANCE_GRID, URGENCY_GRID, indexing='ij')
+    rng = np.random.default_rng(3)
+    importances = np.concatenate([importances.ravel(), rng.uniform(0, 10, 200)])
+    urgencies = np.concatenate([urgencies.ravel(), rng.uniform(0, 10, 200)])
+    reference = FuzzyPriorityScorer(backend='skfuzzy').computePriorityScores(importances, urgencies)
+    assert np.abs(mamdaniScores(importances, urgencies) - reference).max() <= NUMPY_BACKEND_TOLERANCE
+
+def test_lookup_table_verification(tmp_path, monkeypatch):
+    # the numpy engine stands in for skfuzzy, which it matches (see above), to keep the test fast
+    monkeypatch.setattr(FuzzyPriorityScorer, 'computePriorityScore',
+                        lambda self, importance, urgency: float(mamdaniScores([importance], [urgency])[0]))
+    cache_file = str(tmp_path / 'table.npz')
+    scorer = FuzzyPriorityScorer(use_lookup_table=True, cache_file=cache_file, verify_lookup_table=True)
+    assert scorer.verifyLookupTable()
+
+    scorer.lookup_table[3, 40] += 0.01
+    scorer.saveLookupTable(cache_file)  # a cache that drifted from the fuzzy system
+    assert not scorer.verifyLookupTable()
+    with pytest.raises(ValueError):
+        FuzzyPriorityScorer(use_lookup_table=True, cache_file=cache_file, verify_lookup_table=True)
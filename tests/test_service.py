@@ -0,0 +1,62 @@
+import asyncio
+import datetime
+import json
+import types
+
+import pytest
+
+import tasklist
+from service import TaskService
+from task import Task
+from tasklist import TaskList
+
+START = datetime.datetime(2030, 1, 1, 9)
+
+@pytest.fixture
+def clock(monkeypatch):
+    class FakeDateTime(datetime.datetime):
+        current = START
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+    monkeypatch.setattr(tasklist, 'datetime', types.SimpleNamespace(datetime=FakeDateTime, timedelta=datetime.timedelta))
+    return FakeDateTime
+
+def request(service, method, target, body=None):
+    return asyncio.run(service.respond(method, target, json.dumps(body) if body is not None else ''))
+
+def makeTasks():
+    return [Task(f"task {k}", k % 11, START + datetime.timedelta(days=5, hours=7 * k) if k % 3 else None) for k in range(40)]
+
+def expected(tasks, scorer):
+    # the tasks scored from scratch at the current time, in ranked order
+    fresh = TaskList(scorer)
+    fresh.addTasks([Task(task.task_name, task.importance, task.deadline) for task in tasks])
+    return [(task.task_name, task.urgency, task.priority_score) for task in fresh.tasks]
+
+def served(service, name):
+    _, body = request(service, 'GET', f'/lists/{name}/tasks?limit=100')
+    return [(task['task_name'], task['urgency'], task['priority_score']) for task in body['tasks']]
+
+def test_lists_saved_earlier_are_served_with_current_urgencies(clock, scorer, tmp_path):
+    tasks = makeTasks()
+    task_list = TaskList(scorer)
+    task_list.addTasks(tasks)
+    task_list.saveToJson(str(tmp_path / 'old.json'))
+
+    clock.current = START + datetime.timedelta(days=2)
+    service = TaskService(str(tmp_path), scorer, batch_delay=0, save_delay=60)
+    assert served(service, 'old') == expected(tasks, scorer)
+    clock.current = START + datetime.timedelta(days=4)  # while the list stays loaded
+    assert served(service, 'old') == expected(tasks, scorer)
+
+def test_importance_out_of_range_is_rejected(clock, scorer, tmp_path):
+    service = TaskService(str(tmp_path), scorer, batch_delay=0, save_delay=60)
+    for importance in [-1, 11, 200]:
+        status, body = request(service, 'POST', '/lists/work/tasks', {'task_name': "a", 'importance': importance})
+        assert status == 400 and 'importance' in body['error']
+    assert request(service, 'POST', '/lists/work/tasks', {'task_name': "a", 'importance': 10}) == (201, {'task_id': 0})
+    status, _ = request(service, 'PATCH', '/lists/work/tasks/0', {'importance': 50})
+    assert status == 400
+    assert request(service, 'GET', '/lists/work/tasks/0')[1]['importance'] == 10
@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+
+from sqlite_storage import SqliteStorage
+from storage import TaskStorage
+from task import Task
+from tasklist import TaskList
+
+def test_storage_methods_are_abstract():
+    with pytest.raises(TypeError):
+        TaskStorage()
+
+@pytest.fixture
+def storage(tmp_path, scorer):
+    storage = SqliteStorage(str(tmp_path / 'tasks.db'))
+    task_list = TaskList(scorer)
+    storage.attach(task_list)
+    now = datetime.datetime.now()
+    task_list.addTasks([Task(f"task {k}", k % 11, now + datetime.timedelta(days=k) if k % 2 else None) for k in range(20)])
+    yield storage
+    storage.close()
+
+def test_changes_reach_the_database(storage):
+    task_list = storage.task_list
+    task_list.deleteTask(task_list.tasks[0].task_id)
+    task = task_list.tasks[0]
+    task_list.updateTask(task.task_id, task_name='renamed')
+
+    assert storage.countTasks() == 19
+    assert storage.getTask(task.task_id).task_name == 'renamed'
+
+def test_top_tasks_page_by_priority(storage):
+    expected = [task.task_id for task in storage.task_list.tasks if not task.is_complete]
+    pages = storage.topTasks(5) + storage.topTasks(5, offset=5)
+    assert [task.task_id for task in pages] == expected[:10]
+
+def test_tasks_due_between(storage):
+    now = datetime.datetime.now()
+    due = storage.tasksDueBetween(now, now + datetime.timedelta(days=6))
+    assert sorted(task.task_name for task in due) == ['task 1', 'task 3', 'task 5']
+
+def test_load_round_trips(storage, scorer):
+    loaded = TaskList(scorer)
+    SqliteStorage(storage.filename).load(loaded)
+    assert sorted(task.task_name for task in loaded.tasks) == sorted(task.task_name for task in storage.task_list.tasks)
+
+def scores(task_list):
+    return {task.task_id: (task.urgency, task.priority_score) for task in task_list.tasks}
+
+def rescored(storage, scorer):
+    # what a list scored from scratch makes of the database rows
+    task_list = TaskList(scorer)
+    task_list.addTasks(storage.getTask(task_id) for task_id in range(20) if storage.getTask(task_id))
+    return scores(task_list)
+
+def test_update_goes_through_the_attached_list(storage):
+    task_list = storage.task_list
+    task = task_list.tasks[-1]
+    storage.updateTask(task.task_id, importance=10)
+    assert task_list.getTask(task.task_id).importance == 10
+    stored = storage.getTask(task.task_id)
+    assert (stored.importance, stored.priority_score) == (10, task_list.getTask(task.task_id).priority_score)
+    assert [task.task_id for task in storage.topTasks(20)] == \
+        [task.task_id for task in task_list.tasks if not task.is_complete]
+
+def test_update_without_a_list_rescores_rows(storage, scorer):
+    filename = storage.filename
+    storage.close()
+    detached = SqliteStorage(filename, scorer)
+    task_id = detached.topTasks(20)[-1].task_id
+    detached.updateTask(task_id, importance=10)
+    assert detached.getTask(task_id).importance == 10
+    assert {task.task_id: (task.urgency, task.priority_score) for task in detached.topTasks(20)} == \
+        rescored(detached, scorer)
+
+    # a new closest deadline moves every urgency
+    detached.updateTask(task_id, deadline=datetime.datetime.now() + datetime.timedelta(hours=2))
+    assert {task.task_id: (task.urgency, task.priority_score) for task in detached.topTasks(20)} == \
+        rescored(detached, scorer)
+    with pytest.raises(ValueError):
+        detached.updateTask(task_id, urgency=3)
+    detached.close()
+
+def test_load_keeps_stored_scores(storage, scorer):
+    loaded = TaskList(scorer)
+    reloaded = SqliteStorage(storage.filename)
+    reloaded.load(loaded)
+    assert reloaded._scorerVersion() == scorer.version
+    assert scores(loaded) == scores(storage.task_list)
+    reloaded.close()
+
+def test_import_file_replaces_the_rows(storage, scorer, tmp_path):
+    other = TaskList(scorer)
+    other.addTasks([Task('imported', 4, None)])
+    filename = str(tmp_path / 'other.jsonl')
+    other.saveToFile(filename)
+    storage.importFile(filename, storage.task_list)
+    assert storage.task_list.storage is storage
+    assert [task.task_name for task in storage.topTasks(10)] == ['imported']
+    assert [task.task_name for task in storage.task_list.tasks] == ['imported']
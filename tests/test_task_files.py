@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import task_files
+from task_files import TaskFile, readColumns, writeColumns
+from task_store import ColumnBuilder
+
+def makeColumns(count):
+    builder = ColumnBuilder()
+    names = ["plain", "café au lait", "日本語のタスク", "emoji 🚀", 'quote " and \\ backslash']
+    for k in range(count):
+        builder.append({
+            'task_id': k if k % 5 else None,
+            'task_name': f"{names[k % len(names)]} {k % 7}",
+            'importance': k % 11,
+            'deadline': f"2030-01-{1 + k % 28:02d}T{k % 24:02d}:30:00" if k % 3 else None,
+            'urgency': k / 7 if k % 4 else None,
+            'priority_score': k * 0.5 if k % 4 else None,
+            'is_complete': k % 6 == 0,
+        })
+    return builder.build()
+
+@pytest.mark.parametrize('extension', ['.json', '.jsonl', '.tasks'])
+@pytest.mark.parametrize('count', [0, 1, 100])
+def test_round_trip(tmp_path, extension, count):
+    columns = makeColumns(count)
+    filename = str(tmp_path / ('tasks' + extension))
+    writeColumns(filename, columns, 'v1')
+    read, scorer_version = readColumns(filename)
+    assert scorer_version == 'v1'
+    assert read.toDicts() == columns.toDicts()
+
+def test_json_is_the_indented_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_files, 'WRITE_BATCH', 7)  # several batches
+    for count in [0, 30]:
+        columns = makeColumns(count)
+        filename = str(tmp_path / 'tasks.json')
+        writeColumns(filename, columns, 'v1')
+        with open(filename) as file:
+            assert file.read() == json.dumps({'scorer_version': 'v1', 'tasks': columns.toDicts()}, indent=4)
+
+@pytest.mark.parametrize('block_size', [1, 3, 16])
+def test_tiny_blocks(tmp_path, monkeypatch, block_size):
+    # every task, name and the header straddle block boundaries
+    columns = makeColumns(40)
+    saved = str(tmp_path / 'saved.json')
+    writeColumns(saved, columns, 'v1')
+    legacy = tmp_path / 'legacy.json'
+    legacy.write_text(json.dumps(columns.toDicts()))
+    monkeypatch.setattr(task_files, 'BLOCK_SIZE', block_size)
+    assert readColumns(saved)[0].toDicts() == columns.toDicts()
+    read, scorer_version = readColumns(str(legacy))
+    assert scorer_version is None
+    assert read.toDicts() == columns.toDicts()
+
+def test_truncated_json_is_an_error(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'tasks.json')
+    writeColumns(filename, makeColumns(10), 'v1')
+    with open(filename) as file:
+        text = file.read()
+    monkeypatch.setattr(task_files, 'BLOCK_SIZE', 5)
+    for cut in [text.index('"tasks"') + 3, len(text) // 2, len(text) - 8]:
+        with open(filename, 'w') as file:
+            file.write(text[:cut])
+        with pytest.raises(ValueError):
+            readColumns(filename)
+
+def test_task_file_indexing(tmp_path):
+    columns = makeColumns(50)
+    filename = str(tmp_path / 'tasks.tasks')
+    writeColumns(filename, columns, 'v1')
+    expected = columns.toDicts()
+    with TaskFile(filename) as task_file:
+        assert len(task_file) == 50
+        assert task_file.scorer_version == 'v1'
+        assert task_file[0] == expected[0]
+        assert task_file[-1] == expected[-1]
+        for index in [slice(None, 3), slice(10, 20), slice(-5, None), slice(45, 100), slice(30, 10),
+                      slice(None, None, 7), slice(40, 2, -3)]:
+            assert task_file[index] == expected[index]
+        assert list(task_file) == expected
+        with pytest.raises(IndexError):
+            task_file[50]
+
+def test_not_a_task_file(tmp_path):
+    for content in [b'', b'{"tasks": []}' + b'\0' * 200]:
+        filename = tmp_path / 'bad.tasks'
+        filename.write_bytes(content)
+        with pytest.raises(ValueError):
+            TaskFile(str(filename))
@@ -0,0 +1,76 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from task import Task
+from task_index import SortedIndex
+from tasklist import TaskList
+
+def makeIndex(keys, ids):
+    index = SortedIndex(np.float64)
+    index.insert(np.array(keys, dtype=np.float64), np.array(ids, dtype=np.int64))
+    return index
+
+def test_insert_keeps_keys_then_ids_sorted():
+    index = makeIndex([2.0, 1.0, 2.0, 0.5], [7, 3, 4, 9])
+    index.insert(np.array([2.0]), np.array([5]))
+    assert index.keys.tolist() == [0.5, 1.0, 2.0, 2.0, 2.0]
+    assert index.ids.tolist() == [9, 3, 4, 5, 7]
+
+def test_between_and_equal():
+    index = makeIndex(range(100), range(100, 200))
+    assert index.between(10, 13).tolist() == [110, 111, 112]
+    assert index.between(None, 2).tolist() == [100, 101]
+    assert index.between(98).tolist() == [198, 199]
+    assert sorted(index.equal(np.array([5.0, 50.0, 500.0])).tolist()) == [105, 150]
+
+@pytest.mark.parametrize('count', [1, 10])  # a binary searched and a rebuilt batch
+def test_remove(count):
+    keys = np.arange(200, dtype=np.float64) % 7
+    ids = np.arange(200, dtype=np.int64)
+    index = makeIndex(keys, ids)
+    gone = ids[::200 // count][:count]
+    index.remove(keys[gone], gone)
+    assert len(index) == 200 - count
+    assert not np.isin(gone, index.ids).any()
+    assert (np.diff(index.keys) >= 0).all()
+
+@pytest.mark.parametrize('count', [1, 10])
+def test_remove_missing_pair_raises_and_keeps_index(count):
+    keys = np.arange(200, dtype=np.float64)
+    ids = np.arange(200, dtype=np.int64)
+    index = makeIndex(keys, ids)
+    wrong_keys = keys[:count].copy()
+    wrong_keys[-1] += 0.5  # filed under another key
+    with pytest.raises(KeyError):
+        index.remove(wrong_keys, ids[:count])
+    with pytest.raises(KeyError):
+        index.remove(keys[:count], ids[:count] + 1000)
+    assert index.ids.tolist() == ids.tolist()
+
+def test_search_matches_brute_force():
+    now = datetime.datetime(2030, 1, 1)
+    tasks = [Task(f"{word} {k}", k % 11, now + datetime.timedelta(hours=k) if k % 3 else None)
+             for k, word in enumerate(['alpha', 'beta', 'Gamma', 'alphabet'] * 25)]
+    for task in tasks[::5]:
+        task.is_complete = True
+    task_list = TaskList()
+    task_list.addTasks(tasks)
+    after, before = now + datetime.timedelta(hours=10), now + datetime.timedelta(hours=60)
+    for text, prefix, complete in [('alpha', None, None), ('ph', None, None), ('a 1', None, False),
+                                   (None, 'gam', None), (None, None, True)]:
+        found = task_list.search(text, prefix, after, before, complete, limit=None)
+        expected = [task for task in task_list.tasks
+                    if (text is None or text.lower() in task.task_name.lower())
+                    and (prefix is None or task.task_name.lower().startswith(prefix))
+                    and task.deadline is not None and after <= task.deadline < before
+                    and (complete is None or task.is_complete == complete)]
+        assert [task.task_id for task in found] == [task.task_id for task in expected]
+
+def test_search_ids_match_search():
+    task_list = TaskList()
+    task_list.addTasks([Task(f"{word} {k}", k % 11, None) for k, word in enumerate(['alpha', 'beta'] * 60)])
+    for text, complete in [('alpha', None), ('a 1', None), (None, False), (None, None)]:
+        assert task_list.searchIds(text, complete=complete).tolist() == \
+            [task.task_id for task in task_list.search(text, complete=complete, limit=len(task_list))]
@@ -0,0 +1,73 @@
+import datetime
+import json
+
+import pytest
+
+import task_store
+from task import Task
+from task_store import TaskStore, NO_DEADLINE, toMicroseconds
+from tasklist import TaskList
+
+def test_put_delete_and_columns():
+    store = TaskStore(capacity=4)
+    deadline = datetime.datetime(2030, 1, 1)
+    store.putMany([0, 1, 2], ['a', 'b', 'a'], [1, 2, 3], [deadline, None, None], [None] * 3, [None] * 3,
+                  [False, True, False])
+    assert store.count == 3
+    store.delete(1)
+    assert store.count == 2
+    assert store.liveRows().tolist() == [0, 2]
+
+    columns = store.columns(store.liveRows())
+    assert columns.names == ['a']
+    assert columns.deadlines.tolist() == [toMicroseconds(deadline), NO_DEADLINE]
+    assert columns.importances.tolist() == [1, 3]
+
+def test_deleted_rows_are_reused():
+    task_list = TaskList()
+    ids = [task_list.addTask(Task(f"task {k}", 5, None)) for k in range(10)]
+    for _ in range(200):
+        task_list.deleteTask(ids.pop(0))
+        ids.append(task_list.addTask(Task("churn", 5, None)))
+    assert task_list._store.size == 10
+    assert sorted(ids) == list(range(10))
+
+def test_unused_names_are_dropped(monkeypatch):
+    monkeypatch.setattr(task_store, 'NAME_SLACK', 8)
+    task_list = TaskList()
+    kept = task_list.addTask(Task("kept", 3, None))
+    task_id = task_list.addTask(Task("renamed 0", 3, None))
+    for k in range(1, 50):
+        task_list.updateTask(task_id, task_name=f"renamed {k}")
+        # the index built here caches name ids that compaction renumbers
+        assert [task.task_id for task in task_list.search(f"renamed {k}")] == [task_id]
+    for k in range(20):
+        task_list.deleteTask(task_list.addTask(Task(f"gone {k}", 3, None)))
+
+    store = task_list._store
+    assert len(store.names) <= store.count + 8
+    assert task_list.getTask(kept).task_name == "kept"
+    assert task_list.getTask(task_id).task_name == "renamed 49"
+    assert [task.task_id for task in task_list.search("renamed")] == [task_id]
+    assert [task.task_id for task in task_list.search("kept")] == [kept]
+    assert task_list.search("gone") == []
+
+def test_replace_loads_reuse_the_rows(tmp_path):
+    filename = tmp_path / 'legacy.json'
+    filename.write_text(json.dumps([{'task_name': f"task {k}", 'importance': 5, 'deadline': None, 'is_complete': False}
+                                    for k in range(100)]))
+    task_list = TaskList()
+    for _ in range(5):
+        task_list.loadFromJson(str(filename), replace=True)
+    assert task_list._store.size == 100
+    assert sorted(task.task_id for task in task_list.tasks) == list(range(100))
+
+def test_failed_put_hands_its_id_out_again():
+    task_list = TaskList()
+    ids = [task_list.addTask(Task(f"task {k}", 5, None)) for k in range(3)]
+    task_list.deleteTask(ids[1])
+    for _ in range(2):  # first the deleted row, then a new one
+        with pytest.raises(OverflowError):
+            task_list.addTask(Task("too important", 200, None))
+        task_list.addTask(Task("fits", 5, None))
+    assert sorted(task.task_id for task in task_list.tasks) == [0, 1, 2, 3]
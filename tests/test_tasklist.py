@@ -0,0 +1,80 @@
+import datetime
+import json
+
+from storage import TaskStorage
+from task import Task
+from tasklist import TaskList
+
+def makeTasks(count, now=None):
+    now = now or datetime.datetime.now()
+    return [Task(f"task {k}", k % 11, now + datetime.timedelta(hours=k + 1) if k % 2 else None) for k in range(count)]
+
+def test_save_writes_scorer_version_and_tasks(tmp_path, scorer):
+    task_list = TaskList(scorer)
+    task_list.addTasks(makeTasks(5))
+    filename = str(tmp_path / 'tasks.json')
+    task_list.saveToJson(filename)
+
+    with open(filename) as file:
+        data = json.load(file)
+    assert data['scorer_version'] == scorer.version
+    assert [task['task_name'] for task in data['tasks']] == [task.task_name for task in task_list.tasks]
+
+def test_load_accepts_bare_task_list(tmp_path, scorer):
+    # the layout written before scorer versions were stored
+    old = TaskList(scorer)
+    old.addTasks(makeTasks(5))
+    filename = tmp_path / 'old.json'
+    filename.write_text(json.dumps([task.toDict() for task in old.tasks]))
+
+    task_list = TaskList(scorer)
+    task_list.loadFromJson(str(filename))
+    assert sorted(task.task_name for task in task_list.tasks) == sorted(task.task_name for task in old.tasks)
+
+def test_merge_keeps_existing_duplicates(tmp_path, scorer):
+    deadline = datetime.datetime(2030, 1, 1)
+    task_list = TaskList(scorer)
+    task_list.addTasks([Task('dup', 5, deadline), Task('dup', 5, deadline), Task('own', 2)])
+    existing_ids = sorted(task.task_id for task in task_list.tasks)
+
+    imported = TaskList(scorer)
+    done = Task('new', 7)
+    done.is_complete = True
+    imported.addTasks([Task('dup', 5, deadline), Task('new', 7), done, Task('new', 7)])
+    filename = str(tmp_path / 'import.json')
+    imported.saveToJson(filename)
+
+    task_list.mergeFromFiles([filename, filename], rule='complete', workers=2)
+    names = sorted((task.task_name, task.is_complete) for task in task_list.tasks)
+    assert names == [('dup', False), ('dup', False), ('new', True), ('own', False)]
+    assert set(existing_ids) <= {task.task_id for task in task_list.tasks}
+
+def test_trusted_load_is_reported_and_scheduled(tmp_path, scorer):
+    now = datetime.datetime.now()
+    saved = TaskList(scorer)
+    saved.addTasks(makeTasks(20, now))
+    filename = str(tmp_path / 'tasks.json')
+    saved.saveToJson(filename)
+    with open(filename) as file:
+        data = json.load(file)
+    stale = next(task for task in data['tasks'] if task['deadline'])
+    stale['urgency'] = 10.0 if stale['urgency'] != 10.0 else 5.0  # as if saved a while ago
+    with open(filename, 'w') as file:
+        json.dump(data, file)
+
+    recorded = []
+    class Recorder(TaskStorage):
+        def recordPut(self, task):
+            recorded.append(task.task_id)
+        def recordDelete(self, task_id):
+            pass
+        def load(self, task_list):
+            pass
+    task_list = TaskList(scorer)
+    Recorder().attach(task_list)
+    task_list.loadFromJson(filename, trust_persisted_scores=True)
+
+    assert sorted(recorded) == sorted(task.task_id for task in task_list.tasks)
+    assert task_list.nextUrgencyChange() is not None
+    assert [(task.task_name, task.urgency, task.priority_score) for task in task_list.tasks] == \
+        [(task.task_name, task.urgency, task.priority_score) for task in saved.tasks]
@@ -0,0 +1,79 @@
+import datetime
+import types
+
+import pytest
+
+import tasklist
+from task import Task
+from tasklist import TaskList
+
+START = datetime.datetime(2030, 1, 1, 9)
+
+@pytest.fixture
+def clock(monkeypatch):
+    # TaskList takes the time of a full urgency pass from datetime.datetime.now()
+    class FakeDateTime(datetime.datetime):
+        current = START
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+    monkeypatch.setattr(tasklist, 'datetime', types.SimpleNamespace(datetime=FakeDateTime, timedelta=datetime.timedelta))
+    return FakeDateTime
+
+def makeTasks():
+    tasks = [Task(f"task {k}", k % 11, START + datetime.timedelta(minutes=90 + 37 * k) if k % 4 else None)
+             for k in range(120)]
+    tasks[5].is_complete = True
+    return tasks
+
+def recomputed(task_list, scorer):
+    # urgencies and order of a list scored from scratch at the current time
+    copies = [Task(task.task_name, task.importance, task.deadline) for task in task_list.tasks]
+    for copy, task in zip(copies, task_list.tasks):
+        copy.is_complete = task.is_complete
+    fresh = TaskList(scorer)
+    fresh.addTasks(copies)
+    return [(task.task_name, task.urgency) for task in fresh.tasks]
+
+def current(task_list):
+    return [(task.task_name, task.urgency) for task in task_list.tasks]
+
+def test_rescore_due_matches_full_recompute(clock, scorer):
+    task_list = TaskList(scorer)
+    task_list.addTasks(makeTasks())
+    partial = False
+    for minutes in [1, 7, 13, 29, 30, 44, 61, 75, 88, 89]:
+        clock.current = START + datetime.timedelta(minutes=minutes)
+        due = task_list.rescoreDue(clock.current)
+        partial = partial or 0 < len(due) < len(task_list.tasks)
+        assert current(task_list) == recomputed(task_list, scorer)
+        assert task_list.nextUrgencyChange() > clock.current
+    assert partial  # only the tasks whose urgency moved were rescored
+
+def test_completing_the_closest_task_moves_the_anchor(clock, scorer):
+    task_list = TaskList(scorer)
+    task_list.addTasks(makeTasks())
+    closest = min((task for task in task_list.tasks if task.deadline and not task.is_complete),
+                  key=lambda task: task.deadline)
+    clock.current = START + datetime.timedelta(minutes=20)
+    task_list.rescoreDue(clock.current)
+
+    task_list.updateTask(closest.task_id, is_complete=True)
+    assert task_list.getTask(closest.task_id).urgency == 0
+    assert current(task_list) == recomputed(task_list, scorer)
+    clock.current = START + datetime.timedelta(minutes=100)
+    task_list.rescoreDue(clock.current)
+    assert current(task_list) == recomputed(task_list, scorer)
+
+def test_closest_deadline_passing_clears_urgencies(clock, scorer):
+    task_list = TaskList(scorer)
+    task_list.addTasks(makeTasks())
+    closest_deadline = min(task.deadline for task in task_list.tasks if task.deadline and not task.is_complete)
+    assert task_list.nextUrgencyChange() <= closest_deadline
+
+    clock.current = closest_deadline + datetime.timedelta(seconds=1)
+    task_list.rescoreDue(clock.current)
+    assert all(task.urgency == 0 for task in task_list.tasks)
+    assert task_list.nextUrgencyChange() is None
+    assert current(task_list) == recomputed(task_list, scorer)
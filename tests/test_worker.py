@@ -0,0 +1,58 @@
+import json
+import threading
+
+from task import Task
+from tasklist import TaskList
+from worker import TaskWorker
+
+def runBatch(worker, jobs):
+    # hold the worker in a job until every job is queued, so they all run as one batch
+    release = threading.Event()
+    worker.submit(lambda job: release.wait())
+    submitted = [worker.submit(*job) if isinstance(job, tuple) else worker.submit(job) for job in jobs]
+    release.set()
+    worker.stop()
+    return submitted
+
+def test_add_then_save_in_one_batch_saves_the_new_task(tmp_path, scorer):
+    task_list = TaskList(scorer)
+    task_list.addTask(Task('a', 5, None))
+    task_list.addTask(Task('b', 7, None))
+    filename = str(tmp_path / 'tasks.json')
+    worker = TaskWorker(task_list)
+    runBatch(worker, [lambda job: task_list.addTask(Task('c', 3, None)),
+                      lambda job: task_list.saveToJson(filename)])
+
+    with open(filename) as file:
+        saved = [task['task_name'] for task in json.load(file)['tasks']]
+    assert sorted(saved) == ['a', 'b', 'c']
+
+def test_deferred_tasks_are_listed_and_serialized(scorer):
+    task_list = TaskList(scorer)
+    task_list.defer_rescoring = True
+    task_list.addTask(Task('a', 5, None))
+    assert len(task_list.toColumns()) == 1
+    task_list.addTask(Task('b', 5, None))
+    assert [task['task_name'] for task in task_list.toJsonData()['tasks']] == ['a', 'b']
+    task_list.addTask(Task('c', 5, None))
+    assert len(task_list.tasks) == len(task_list) == 3
+
+def test_queued_jobs_with_a_key_coalesce_into_the_latest(scorer):
+    worker = TaskWorker(TaskList(scorer))
+    ran = []
+    jobs = runBatch(worker, [(lambda job: ran.append(1), None, None, None, 'save'),
+                             lambda job: ran.append('edit'),
+                             (lambda job: ran.append(2), None, None, None, 'save')])
+    worker.poll()
+    assert ran == ['edit', 2]
+    assert len(jobs) == 3
+
+def test_callbacks_run_on_poll(scorer):
+    task_list = TaskList(scorer)
+    worker = TaskWorker(task_list)
+    done, errors = [], []
+    runBatch(worker, [(lambda job: task_list.addTask(Task('a', 5, None)), done.append, errors.append),
+                      (lambda job: task_list.getTask(12345), done.append, errors.append)])
+    assert done == errors == []
+    worker.poll()
+    assert len(done) == 1 and isinstance(errors[0], KeyError)
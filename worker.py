@@ -0,0 +1,121 @@
+from tasklist import TaskList
+import metrics
+import queue
+import threading
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    # a unit of work run on the worker thread; fn(job) returns the result handed to on_done
+    # on_error receives the exception, JobCancelled if the job was cancelled
+    def __init__(self, fn, on_done=None, on_error=None, on_progress=None, coalesce_key=None):
+        self.fn = fn
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.coalesce_key = coalesce_key  # queued jobs with the same key collapse into the latest one
+        self._cancelled = threading.Event()
+        self._results = None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def progress(self, done, total):
+        # called from fn; also the point where a cancelled job stops
+        if self.cancelled:
+            raise JobCancelled()
+        if self.on_progress:
+            self._results.put(('progress', self, (done, total)))
+
+class TaskWorker:
+    # runs TaskList work off the Tk thread, one job at a time, and hands results back through a queue
+    def __init__(self, task_list:TaskList):
+        self.task_list = task_list
+        self.lock = threading.RLock()  # held while a job touches the list; readers use tryLock
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        return self._busy or not self._jobs.empty()
+
+    def submit(self, fn, on_done=None, on_error=None, on_progress=None, coalesce_key=None):
+        job = Job(fn, on_done, on_error, on_progress, coalesce_key)
+        job._results = self._results
+        self._jobs.put(job)
+        return job
+
+    def tryLock(self):
+        return self.lock.acquire(blocking=False)
+
+    def unlock(self):
+        self.lock.release()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            self._busy = True
+
+            # take everything queued meanwhile, so edits made during a long job are handled as one batch
+            batch = [job]
+            while True:
+                try:
+                    batch.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            batch = [job for job in batch if job is not None]
+            latest = {job.coalesce_key: job for job in batch if job.coalesce_key is not None}
+            batch = [job for job in batch if job.coalesce_key is None or latest[job.coalesce_key] is job]
+
+            with self.lock, metrics.profiled():
+                self.task_list.defer_rescoring = True
+                finished = []
+                try:
+                    for job in batch:
+                        if job.cancelled:
+                            self._results.put(('error', job, JobCancelled()))
+                            continue
+                        try:
+                            finished.append((job, job.fn(job)))
+                        except Exception as e:  # including JobCancelled
+                            self._results.put(('error', job, e))
+                finally:
+                    # one rescore for every change in the batch instead of one per edit
+                    self.task_list.defer_rescoring = False
+                    self.task_list.rescoreDirty()
+
+            for job, result in finished:
+                self._results.put(('done', job, result))
+            self._busy = False
+            if stop:
+                return
+
+    def poll(self):
+        # called on the Tk thread: run the callbacks of everything that finished since the last poll
+        while True:
+            try:
+                kind, job, value = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'done' and job.on_done:
+                job.on_done(value)
+            elif kind == 'error' and job.on_error:
+                job.on_error(value)
+            elif kind == 'progress' and job.on_progress:
+                job.on_progress(*value)
+
+    def stop(self):
+        # finish queued work, then end the thread
+        self._jobs.put(None)
+        self._thread.join()